@@ -9,9 +9,26 @@ import sys
 import click
 
 from collector.config import load_config
+from collector.daemon import Collector, run_daemon
+from collector.db import init_db, open_readonly, stats
 
 log = logging.getLogger("collector")
 
+try:
+    import uvloop
+except ImportError:  # pragma: no cover - optional (not available on Windows)
+    uvloop = None
+
+
+def _run_daemon_loop(main) -> None:
+    """Run *main* on uvloop when available, else the default asyncio loop."""
+    loop_factory = uvloop.new_event_loop if uvloop is not None else None
+    with asyncio.Runner(loop_factory=loop_factory) as runner:
+        if sys.version_info >= (3, 12):
+            # Let short-lived tasks run inline until their first real suspension.
+            runner.get_loop().set_task_factory(asyncio.eager_task_factory)
+        runner.run(main)
+
 
 def _setup_logging(verbose: bool) -> None:
     level = logging.DEBUG if verbose else logging.INFO
@@ -38,9 +55,6 @@ def cli(ctx: click.Context, config_path: str | None, verbose: bool) -> None:
 @click.pass_context
 def run(ctx: click.Context) -> None:
     """Start the collector daemon (foreground)."""
-    from collector.daemon import run_daemon
-    from collector.db import init_db
-
     cfg = ctx.obj["cfg"]
 
     async def _main() -> None:
@@ -51,7 +65,7 @@ def run(ctx: click.Context) -> None:
             await db.close()
 
     try:
-        asyncio.run(_main())
+        _run_daemon_loop(_main())
     except KeyboardInterrupt:
         log.info("Shutting down.")
 
@@ -60,8 +74,6 @@ def run(ctx: click.Context) -> None:
 @click.pass_context
 def status(ctx: click.Context) -> None:
     """Show collection statistics."""
-    from collector.db import open_readonly, stats
-
     cfg = ctx.obj["cfg"]
 
     async def _main() -> None:
@@ -81,9 +93,6 @@ def status(ctx: click.Context) -> None:
 @click.pass_context
 def backfill(ctx: click.Context) -> None:
     """One-time pull of historical resolved markets."""
-    from collector.daemon import Collector
-    from collector.db import init_db
-
     cfg = ctx.obj["cfg"]
 
     async def _main() -> None:
@@ -101,15 +110,14 @@ def backfill(ctx: click.Context) -> None:
 
 
 @cli.command()
-@click.option("--format", "fmt", type=click.Choice(["parquet", "grpo", "sft"]), default="parquet")
+@click.option("--format", "fmt", type=click.Choice(["parquet", "grpo", "sft", "all"]), default="parquet")
 @click.option("--category", default=None, help="Filter by category (e.g. 'Climate and Weather')")
 @click.option("--platform", default=None, type=click.Choice(["polymarket", "kalshi"]),
               help="Filter by platform")
 @click.pass_context
 def export(ctx: click.Context, fmt: str, category: str | None, platform: str | None) -> None:
-    """Export resolved markets to Parquet, GRPO, or SFT format."""
-    from collector.db import init_db
-    from collector.export import export_parquet, export_prompts, export_sft
+    """Export resolved markets to Parquet, GRPO, or SFT format (or all three)."""
+    from collector.export import export_all, export_parquet, export_prompts, export_sft
 
     cfg = ctx.obj["cfg"]
 
@@ -119,6 +127,10 @@ def export(ctx: click.Context, fmt: str, category: str | None, platform: str | N
             if fmt == "parquet":
                 path = await export_parquet(db, cfg, category=category, platform=platform)
                 click.echo(f"Exported to {path}")
+            elif fmt == "all":
+                paths = await export_all(db, cfg, category=category, platform=platform)
+                for name, path in paths.items():
+                    click.echo(f"Exported {name} to {path}")
             elif fmt == "grpo":
                 path = await export_prompts(db, cfg, category=category, platform=platform)
                 click.echo(f"Exported GRPO prompts to {path}")
@@ -135,8 +147,6 @@ def export(ctx: click.Context, fmt: str, category: str | None, platform: str | N
 @click.pass_context
 def categories(ctx: click.Context) -> None:
     """List all categories and their market counts."""
-    from collector.db import open_readonly
-
     cfg = ctx.obj["cfg"]
 
     async def _main() -> None:
@@ -18,6 +18,9 @@ else:
 _DEFAULT_CONFIG_PATH = "~/.config/polymaster-collector/config.toml"
 _ENV_CONFIG = "COLLECTOR_CONFIG"
 
+# Parsed TOML keyed by (path, mtime_ns, size) so an edited file is re-read.
+_TOML_CACHE: dict[tuple[str, int, int], dict] = {}
+
 
 @dataclass
 class GeneralConfig:
@@ -71,17 +74,27 @@ def _section(raw: dict, cls: type, section: str):
     return cls(**{k: v for k, v in data.items() if k in cls.__dataclass_fields__})
 
 
+def _read_toml(path: Path) -> dict:
+    try:
+        st = path.stat()
+    except OSError:
+        return {}
+    key = (str(path), st.st_mtime_ns, st.st_size)
+    raw = _TOML_CACHE.get(key)
+    if raw is None:
+        with open(path, "rb") as fh:
+            raw = tomllib.load(fh)
+        _TOML_CACHE[key] = raw
+    return raw
+
+
 def load_config(path: str | None = None) -> Config:
     """Load config from *path*, env var, or default location."""
     if path is None:
         path = os.environ.get(_ENV_CONFIG, _DEFAULT_CONFIG_PATH)
     resolved = Path(os.path.expanduser(path))
 
-    if resolved.exists():
-        with open(resolved, "rb") as fh:
-            raw = tomllib.load(fh)
-    else:
-        raw = {}
+    raw = _read_toml(resolved)
 
     cfg = Config(
         general=_section(raw, GeneralConfig, "general"),
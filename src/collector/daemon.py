@@ -3,27 +3,35 @@
 from __future__ import annotations
 
 import asyncio
+import heapq
 import logging
+import random
 import shutil
 import time
 
 import aiosqlite
+import httpx
 
 from collector.config import Config
 from collector.db import (
+    _now_iso,
     get_markets_by_status,
     get_unresolved_past_end,
     insert_snapshots_bulk,
-    mark_closed,
-    mark_resolved,
-    upsert_market,
+    mark_closed_bulk,
+    mark_resolved_bulk,
+    upsert_markets_bulk,
 )
+from collector.platforms.http import new_client
 from collector.platforms.kalshi import KalshiClient
 from collector.platforms.polymarket import PolymarketClient
 
 log = logging.getLogger(__name__)
 
-_MAX_BACKOFF = 300  # 5 minutes
+_MAX_BACKOFF = 300  # 5 minutes — default cap
+# Per-phase caps: discover can wait longer; snapshots go stale quickly.
+_BACKOFF_CAPS = {"discover": 600, "snapshot": 120}
+_RESOLVE_CONCURRENCY = 16  # in-flight check_resolution calls
 
 
 class Collector:
@@ -34,16 +42,20 @@ class Collector:
         self.db = db
         self.poly: PolymarketClient | None = None
         self.kalshi: KalshiClient | None = None
+        self._http: httpx.AsyncClient | None = None
         self._backoff: dict[str, float] = {}
 
     async def start(self) -> None:
+        # One connection pool shared by both platform clients and all phases.
+        self._http = new_client()
         if self.cfg.polymarket.enabled:
             self.poly = PolymarketClient(
                 gamma_url=self.cfg.polymarket.gamma_url,
                 clob_url=self.cfg.polymarket.base_url,
+                http=self._http,
             )
         if self.cfg.kalshi.enabled:
-            self.kalshi = KalshiClient(base_url=self.cfg.kalshi.base_url)
+            self.kalshi = KalshiClient(base_url=self.cfg.kalshi.base_url, http=self._http)
         log.info(
             "Collector started (poly=%s, kalshi=%s)",
             self.cfg.polymarket.enabled,
@@ -55,39 +67,43 @@ class Collector:
             await self.poly.close()
         if self.kalshi:
             await self.kalshi.close()
+        if self._http:
+            await self._http.aclose()
         log.info("Collector stopped")
 
     # ------------------------------------------------------------------
     # Phase runners
     # ------------------------------------------------------------------
 
+    def _platforms(self) -> list[tuple[str, str, PolymarketClient | KalshiClient]]:
+        """Enabled clients as ``(backoff_prefix, platform, client)`` tuples."""
+        out: list[tuple[str, str, PolymarketClient | KalshiClient]] = []
+        if self.poly:
+            out.append(("poly", "polymarket", self.poly))
+        if self.kalshi:
+            out.append(("kalshi", "kalshi", self.kalshi))
+        return out
+
     async def run_discover(self) -> int:
         """DISCOVER phase — fetch and upsert active markets + initial snapshots."""
-        count = 0
-        snap_count = 0
-        if self.poly:
-            try:
-                markets, snapshots = await self.poly.discover_markets()
-                for m in markets:
-                    await upsert_market(self.db, **m)
-                count += len(markets)
-                snap_count += await insert_snapshots_bulk(self.db, snapshots)
-                self._reset_backoff("poly_discover")
-            except Exception:
-                log.error("DISCOVER polymarket failed", exc_info=True)
-                await self._sleep_backoff("poly_discover")
+        now = _now_iso()
 
-        if self.kalshi:
+        async def _discover(key: str, platform: str, client) -> tuple[int, int]:
             try:
-                markets, snapshots = await self.kalshi.discover_markets()
-                for m in markets:
-                    await upsert_market(self.db, **m)
-                count += len(markets)
-                snap_count += await insert_snapshots_bulk(self.db, snapshots)
-                self._reset_backoff("kalshi_discover")
+                markets, snapshots = await client.discover_markets()
+                count = await upsert_markets_bulk(self.db, markets, now=now)
+                snap_count = await insert_snapshots_bulk(self.db, snapshots)
+                self._reset_backoff(f"{key}_discover")
+                return count, snap_count
             except Exception:
-                log.error("DISCOVER kalshi failed", exc_info=True)
-                await self._sleep_backoff("kalshi_discover")
+                log.error("DISCOVER %s failed", platform, exc_info=True)
+                await self._sleep_backoff(f"{key}_discover")
+                return 0, 0
+
+        # Platforms are independent — run them side by side.
+        results = await asyncio.gather(*(_discover(*p) for p in self._platforms()))
+        count = sum(r[0] for r in results)
+        snap_count = sum(r[1] for r in results)
 
         await self.db.commit()
         log.info("DISCOVER complete: %d markets upserted, %d snapshots captured", count, snap_count)
@@ -95,28 +111,27 @@ class Collector:
 
     async def run_snapshot(self) -> int:
         """SNAPSHOT phase — capture prices for tracked active markets."""
-        count = 0
-        if self.poly:
-            try:
-                active = await get_markets_by_status(self.db, "active", "polymarket")
-                if active:
-                    snaps = await self.poly.fetch_prices(active)
-                    count += await insert_snapshots_bulk(self.db, snaps)
-                self._reset_backoff("poly_snapshot")
-            except Exception:
-                log.error("SNAPSHOT polymarket failed", exc_info=True)
-                await self._sleep_backoff("poly_snapshot")
 
-        if self.kalshi:
+        async def _snapshot(key: str, platform: str, client) -> int:
             try:
-                active = await get_markets_by_status(self.db, "active", "kalshi")
-                if active:
-                    snaps = await self.kalshi.fetch_prices(active)
-                    count += await insert_snapshots_bulk(self.db, snaps)
-                self._reset_backoff("kalshi_snapshot")
+                count = 0
+                if client.needs_active_markets:
+                    active = await get_markets_by_status(self.db, "active", platform)
+                    if active:
+                        snaps = await client.fetch_prices(active)
+                        count = await insert_snapshots_bulk(self.db, snaps)
+                else:
+                    # The client already knows what to price; no DB read needed.
+                    snaps = await client.fetch_prices()
+                    count = await insert_snapshots_bulk(self.db, snaps)
+                self._reset_backoff(f"{key}_snapshot")
+                return count
             except Exception:
-                log.error("SNAPSHOT kalshi failed", exc_info=True)
-                await self._sleep_backoff("kalshi_snapshot")
+                log.error("SNAPSHOT %s failed", platform, exc_info=True)
+                await self._sleep_backoff(f"{key}_snapshot")
+                return 0
+
+        count = sum(await asyncio.gather(*(_snapshot(*p) for p in self._platforms())))
 
         await self.db.commit()
         log.info("SNAPSHOT complete: %d rows inserted", count)
@@ -124,26 +139,34 @@ class Collector:
 
     async def run_resolve(self) -> int:
         """RESOLVE phase — check markets past end_date for outcomes."""
-        candidates = await get_unresolved_past_end(self.db)
-        resolved_count = 0
-        for mkt in candidates:
+        now = _now_iso()
+        candidates = await get_unresolved_past_end(self.db, now=now)
+        sem = asyncio.Semaphore(_RESOLVE_CONCURRENCY)
+        resolved: list[tuple[str, str, str]] = []
+        closed: list[tuple[str, str]] = []
+
+        async def _one(mkt) -> None:
             platform = mkt["platform"]
             mid = mkt["market_id"]
             client = self.poly if platform == "polymarket" else self.kalshi
             if client is None:
-                continue
+                return
             try:
-                resolution = await client.check_resolution(mid)
-                if resolution:
-                    await mark_resolved(self.db, platform, mid, resolution)
-                    resolved_count += 1
-                    log.info("RESOLVED %s/%s → %s", platform, mid, resolution)
-                else:
-                    # Market past end_date but not resolved yet — mark closed.
-                    if mkt["status"] == "active":
-                        await mark_closed(self.db, platform, mid)
+                async with sem:
+                    resolution = await client.check_resolution(mid)
             except Exception:
                 log.warning("RESOLVE failed for %s/%s", platform, mid, exc_info=True)
+                return
+            if resolution:
+                resolved.append((platform, mid, resolution))
+                log.info("RESOLVED %s/%s → %s", platform, mid, resolution)
+            elif mkt["status"] == "active":
+                # Market past end_date but not resolved yet — mark closed.
+                closed.append((platform, mid))
+
+        await asyncio.gather(*(_one(m) for m in candidates))
+        resolved_count = await mark_resolved_bulk(self.db, resolved, now=now)
+        await mark_closed_bulk(self.db, closed, now=now)
 
         await self.db.commit()
         log.info("RESOLVE complete: %d markets resolved out of %d candidates", resolved_count, len(candidates))
@@ -155,20 +178,23 @@ class Collector:
 
     async def run_backfill(self) -> int:
         """Pull historical resolved markets from both platforms."""
-        count = 0
-        if self.poly:
-            markets = await self.poly.fetch_resolved_markets()
-            for m in markets:
-                await upsert_market(self.db, **m)
-            count += len(markets)
+        now = _now_iso()
 
-        if self.kalshi:
-            markets = await self.kalshi.fetch_resolved_markets()
-            for m in markets:
-                await upsert_market(self.db, **m)
-            count += len(markets)
+        async def _backfill(key: str, platform: str, client) -> int:
+            markets = await client.fetch_resolved_markets()
+            return await upsert_markets_bulk(self.db, markets, now=now)
+
+        results = await asyncio.gather(
+            *(_backfill(*p) for p in self._platforms()), return_exceptions=True,
+        )
+        count = sum(r for r in results if not isinstance(r, BaseException))
 
         await self.db.commit()
+        # Keep the previous contract: a failing platform still raises, but only
+        # after the other platform's rows have been committed.
+        for r in results:
+            if isinstance(r, BaseException):
+                raise r
         log.info("BACKFILL complete: %d markets", count)
         return count
 
@@ -178,9 +204,12 @@ class Collector:
 
     async def _sleep_backoff(self, key: str) -> None:
         current = self._backoff.get(key, 1.0)
-        self._backoff[key] = min(current * 2, _MAX_BACKOFF)
-        log.info("Backing off %s for %.0fs", key, current)
-        await asyncio.sleep(current)
+        cap = _BACKOFF_CAPS.get(key.rpartition("_")[2], _MAX_BACKOFF)
+        self._backoff[key] = min(current * 2, cap)
+        # Jitter so failing phases/platforms don't retry in lockstep.
+        delay = random.uniform(current / 2, current)
+        log.info("Backing off %s for %.1fs", key, delay)
+        await asyncio.sleep(delay)
 
     def _reset_backoff(self, key: str) -> None:
         self._backoff.pop(key, None)
@@ -208,10 +237,15 @@ async def run_daemon(cfg: Config, db: aiosqlite.Connection) -> None:
     resolve_interval = cfg.general.resolve_interval_minutes * 60
     backfill_interval = cfg.general.backfill_interval_hours * 3600
 
-    last_discover = 0.0
-    last_snapshot = 0.0
-    last_resolve = 0.0
-    last_backfill = 0.0  # runs immediately on first cycle
+    phases = [
+        (collector.run_discover, poll),
+        (collector.run_snapshot, snap_interval),
+        (collector.run_resolve, resolve_interval),
+        (collector.run_backfill, backfill_interval),
+    ]
+    # Min-heap of (next_due, phase_index); every phase is due on the first
+    # cycle and ties run in declaration order.
+    schedule = [(0.0, i) for i in range(len(phases))]
 
     try:
         while True:
@@ -232,32 +266,17 @@ async def run_daemon(cfg: Config, db: aiosqlite.Connection) -> None:
             except OSError:
                 pass  # can't stat — keep running
 
-            now = time.monotonic()
-
-            if now - last_discover >= poll:
-                await collector.run_discover()
-                last_discover = time.monotonic()
-
-            if now - last_snapshot >= snap_interval:
-                await collector.run_snapshot()
-                last_snapshot = time.monotonic()
-
-            if now - last_resolve >= resolve_interval:
-                await collector.run_resolve()
-                last_resolve = time.monotonic()
-
-            if now - last_backfill >= backfill_interval:
-                await collector.run_backfill()
-                last_backfill = time.monotonic()
+            # Sleep until the next earliest event, then re-check the guard.
+            next_due, idx = schedule[0]
+            wait = next_due - time.monotonic()
+            if wait > 0:
+                await asyncio.sleep(wait)
+                continue
+            # Due now: yield once to the loop instead of imposing a delay.
+            await asyncio.sleep(0)
 
-            # Sleep until the next earliest event.
-            next_wake = min(
-                last_discover + poll,
-                last_snapshot + snap_interval,
-                last_resolve + resolve_interval,
-                last_backfill + backfill_interval,
-            )
-            sleep_for = max(1.0, next_wake - time.monotonic())
-            await asyncio.sleep(sleep_for)
+            run_phase, interval = phases[idx]
+            await run_phase()
+            heapq.heapreplace(schedule, (time.monotonic() + interval, idx))
     finally:
         await collector.stop()
@@ -2,17 +2,20 @@
 
 from __future__ import annotations
 
-import json
+import functools
 import logging
+import sqlite3
 from datetime import datetime, timezone
+from operator import itemgetter
 from pathlib import Path
 from typing import Any, Sequence
 
 import aiosqlite
+import orjson
 
 log = logging.getLogger(__name__)
 
-_SCHEMA_VERSION = 1
+_SCHEMA_VERSION = 3
 
 _SCHEMA_SQL = """\
 CREATE TABLE IF NOT EXISTS _meta (
@@ -21,7 +24,6 @@ CREATE TABLE IF NOT EXISTS _meta (
 );
 
 CREATE TABLE IF NOT EXISTS markets (
-    id          INTEGER PRIMARY KEY AUTOINCREMENT,
     platform    TEXT NOT NULL,
     market_id   TEXT NOT NULL,
     slug        TEXT,
@@ -37,15 +39,19 @@ CREATE TABLE IF NOT EXISTS markets (
     resolved_at TEXT,
     created_at  TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%SZ', 'now')),
     updated_at  TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%SZ', 'now')),
-    UNIQUE(platform, market_id)
-);
-
-CREATE INDEX IF NOT EXISTS idx_markets_status ON markets(status);
-CREATE INDEX IF NOT EXISTS idx_markets_platform ON markets(platform);
+    PRIMARY KEY (platform, market_id)
+) WITHOUT ROWID;
+
+-- (status, end_date) serves status-only lookups and the resolve-phase range
+-- scan; (platform, status) serves the per-platform snapshot query.
+DROP INDEX IF EXISTS idx_markets_status;
+DROP INDEX IF EXISTS idx_markets_platform;
+CREATE INDEX IF NOT EXISTS idx_markets_status_end ON markets(status, end_date);
+CREATE INDEX IF NOT EXISTS idx_markets_platform_status ON markets(platform, status);
 CREATE INDEX IF NOT EXISTS idx_markets_end_date ON markets(end_date);
 
 CREATE TABLE IF NOT EXISTS price_snapshots (
-    id          INTEGER PRIMARY KEY AUTOINCREMENT,
+    id          INTEGER PRIMARY KEY,
     market_id   TEXT NOT NULL,
     platform    TEXT NOT NULL,
     yes_price   REAL,
@@ -56,11 +62,14 @@ CREATE TABLE IF NOT EXISTS price_snapshots (
     snapshot_at TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%SZ', 'now'))
 );
 
-CREATE INDEX IF NOT EXISTS idx_snapshots_market ON price_snapshots(market_id);
+-- Covers per-market time-series reads (ordered by snapshot_at) for export.
+DROP INDEX IF EXISTS idx_snapshots_market;
+CREATE INDEX IF NOT EXISTS idx_snapshots_cover
+    ON price_snapshots(market_id, snapshot_at, yes_price, no_price);
 CREATE INDEX IF NOT EXISTS idx_snapshots_time ON price_snapshots(snapshot_at);
 
 CREATE TABLE IF NOT EXISTS news_context (
-    id          INTEGER PRIMARY KEY AUTOINCREMENT,
+    id          INTEGER PRIMARY KEY,
     market_id   TEXT NOT NULL,
     headline    TEXT,
     source      TEXT,
@@ -71,8 +80,115 @@ CREATE INDEX IF NOT EXISTS idx_news_market ON news_context(market_id);
 """
 
 
+@functools.lru_cache(maxsize=64)
+def _upsert_sql(cols: tuple[str, ...]) -> str:
+    """Build (once per column signature) the markets upsert statement."""
+    placeholders = ", ".join(["?"] * len(cols))
+    col_names = ", ".join(cols)
+    update_clause = ", ".join(
+        f"{c} = excluded.{c}" for c in cols if c not in ("platform", "market_id", "created_at")
+    )
+    return (
+        f"INSERT INTO markets ({col_names}) VALUES ({placeholders}) "
+        f"ON CONFLICT(platform, market_id) DO UPDATE SET {update_clause}"
+    )
+
+
+@functools.lru_cache(maxsize=64)
+def _insert_sql(table: str, cols: tuple[str, ...]) -> str:
+    """Build (once per table + column signature) a plain INSERT statement."""
+    placeholders = ", ".join(["?"] * len(cols))
+    return f"INSERT INTO {table} ({', '.join(cols)}) VALUES ({placeholders})"
+
+
+_SNAPSHOT_COLS = (
+    "market_id", "platform", "yes_price", "no_price",
+    "volume", "liquidity", "spread", "snapshot_at",
+)
+_SNAPSHOT_SQL = _insert_sql("price_snapshots", _SNAPSHOT_COLS)
+
+
+# Applied in one round trip on every read-write open (tests included).
+_CONNECT_PRAGMAS = """\
+PRAGMA journal_mode=WAL;
+PRAGMA busy_timeout=5000;
+PRAGMA synchronous=NORMAL;
+PRAGMA temp_store=MEMORY;
+PRAGMA mmap_size=268435456;  -- 256 MiB
+PRAGMA cache_size=-65536;  -- 64 MiB
+"""
+
+
 def _now_iso() -> str:
-    return datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+    t = datetime.now(timezone.utc)
+    return f"{t.year:04d}-{t.month:02d}-{t.day:02d}T{t.hour:02d}:{t.minute:02d}:{t.second:02d}Z"
+
+
+# Tables whose definition changed in a given schema version.  Upgrading past
+# that version rebuilds them from _SCHEMA_SQL and copies the rows across.
+_REBUILD_TABLES: dict[int, tuple[str, ...]] = {
+    2: ("markets", "price_snapshots", "news_context"),  # drop AUTOINCREMENT
+    3: ("markets",),  # natural (platform, market_id) key, WITHOUT ROWID
+}
+
+
+async def _meta_schema_version(db: aiosqlite.Connection) -> int | None:
+    """Schema version recorded in ``_meta``, or None for a fresh database.
+
+    Only consulted for databases created before ``PRAGMA user_version``
+    was stamped.
+    """
+    rows = await db.execute_fetchall(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = '_meta'"
+    )
+    if not rows:
+        return None
+    rows = await db.execute_fetchall(
+        "SELECT value FROM _meta WHERE key = 'schema_version'"
+    )
+    return int(rows[0][0]) if rows else None
+
+
+async def _table_columns(db: aiosqlite.Connection, table: str) -> list[str]:
+    rows = await db.execute_fetchall(f"PRAGMA table_info({table})")
+    return [r[1] for r in rows]
+
+
+async def _migrate(db: aiosqlite.Connection, from_version: int) -> None:
+    """Rebuild changed tables in a single transaction."""
+    tables = sorted({
+        t for v, ts in _REBUILD_TABLES.items() if v > from_version for t in ts
+    })
+    # Column layout of the target schema, read from a scratch in-memory DB.
+    scratch = sqlite3.connect(":memory:")
+    try:
+        scratch.executescript(_SCHEMA_SQL)
+        new_cols = {
+            t: [r[1] for r in scratch.execute(f"PRAGMA table_info({t})")] for t in tables
+        }
+    finally:
+        scratch.close()
+
+    pre: list[str] = []
+    post: list[str] = []
+    for t in tables:
+        old_cols = await _table_columns(db, t)
+        if not old_cols:
+            continue  # table never existed — plain CREATE handles it
+        idx_rows = await db.execute_fetchall(
+            "SELECT name FROM sqlite_master "
+            "WHERE type = 'index' AND tbl_name = ? AND sql IS NOT NULL",
+            [t],
+        )
+        pre += [f"DROP INDEX {r[0]};" for r in idx_rows]
+        pre.append(f"ALTER TABLE {t} RENAME TO _old_{t};")
+        cols = ", ".join(c for c in new_cols[t] if c in old_cols)
+        post.append(f"INSERT INTO {t} ({cols}) SELECT {cols} FROM _old_{t};")
+        post.append(f"DROP TABLE _old_{t};")
+
+    script = "\n".join(["BEGIN;", *pre, _SCHEMA_SQL, *post, "COMMIT;"])
+    await db.executescript(script)
+    log.info("Migrated schema v%d → v%d (rebuilt %s)", from_version, _SCHEMA_VERSION, ", ".join(tables))
 
 
 async def init_db(db_path: str) -> aiosqlite.Connection:
@@ -81,14 +197,20 @@ async def init_db(db_path: str) -> aiosqlite.Connection:
     path.parent.mkdir(parents=True, exist_ok=True)
     db = await aiosqlite.connect(str(path))
     db.row_factory = aiosqlite.Row
-    await db.execute("PRAGMA journal_mode=WAL")
-    await db.execute("PRAGMA busy_timeout=5000")
-    await db.execute("PRAGMA synchronous=NORMAL")
-    await db.executescript(_SCHEMA_SQL)
-    await db.execute(
-        "INSERT OR IGNORE INTO _meta (key, value) VALUES (?, ?)",
-        ("schema_version", str(_SCHEMA_VERSION)),
-    )
+    await db.executescript(_CONNECT_PRAGMAS)
+    # Up-to-date databases skip the DDL script entirely.
+    rows = await db.execute_fetchall("PRAGMA user_version")
+    if rows[0][0] < _SCHEMA_VERSION:
+        version = rows[0][0] or await _meta_schema_version(db)
+        if version is None:
+            await db.executescript(_SCHEMA_SQL)
+        elif version < _SCHEMA_VERSION:
+            await _migrate(db, version)
+        await db.execute(
+            "INSERT OR REPLACE INTO _meta (key, value) VALUES (?, ?)",
+            ("schema_version", str(_SCHEMA_VERSION)),
+        )
+        await db.execute(f"PRAGMA user_version = {_SCHEMA_VERSION}")
     await db.commit()
     log.info("Database ready: %s", path)
     return db
@@ -106,56 +228,90 @@ async def open_readonly(db_path: str) -> aiosqlite.Connection:
 # Markets helpers
 # ---------------------------------------------------------------------------
 
-async def upsert_market(db: aiosqlite.Connection, **kw: Any) -> None:
+async def upsert_market(
+    db: aiosqlite.Connection, *, now: str | None = None, **kw: Any
+) -> None:
     """Insert or update a market row.  Pass column names as keyword args."""
-    now = _now_iso()
+    now = now or _now_iso()
     kw.setdefault("created_at", now)
     kw["updated_at"] = now
     if "outcomes" in kw and not isinstance(kw["outcomes"], str):
-        kw["outcomes"] = json.dumps(kw["outcomes"])
+        kw["outcomes"] = orjson.dumps(kw["outcomes"]).decode()
+    await db.execute(_upsert_sql(tuple(kw)), list(kw.values()))
 
-    cols = list(kw.keys())
-    placeholders = ", ".join(["?"] * len(cols))
-    col_names = ", ".join(cols)
-    update_clause = ", ".join(
-        f"{c} = excluded.{c}" for c in cols if c not in ("platform", "market_id", "created_at")
-    )
-    sql = (
-        f"INSERT INTO markets ({col_names}) VALUES ({placeholders}) "
-        f"ON CONFLICT(platform, market_id) DO UPDATE SET {update_clause}"
-    )
-    await db.execute(sql, list(kw.values()))
+
+async def upsert_markets_bulk(
+    db: aiosqlite.Connection, rows: Sequence[dict], *, now: str | None = None
+) -> int:
+    """Upsert many market rows with one ``executemany`` per column signature.
+
+    Rows are grouped by their key set so that a row never overwrites a
+    column it didn't provide (matching :func:`upsert_market` semantics).
+    """
+    if not rows:
+        return 0
+    now = now or _now_iso()
+    groups: dict[tuple[str, ...], list[dict]] = {}
+    for r in rows:
+        groups.setdefault(tuple(r.keys()), []).append(r)
+
+    for keys, group in groups.items():
+        data_cols = tuple(c for c in keys if c not in ("created_at", "updated_at"))
+        sql = _upsert_sql(data_cols + ("created_at", "updated_at"))
+        outcomes_idx = data_cols.index("outcomes") if "outcomes" in data_cols else None
+        # Every row in a group has the same keys, so one itemgetter pulls a
+        # row's parameters in a single C call (rows always carry platform and
+        # market_id, so it returns a tuple).
+        if "created_at" in keys:
+            get, tail = itemgetter(*data_cols, "created_at"), (now,)
+        else:
+            get, tail = itemgetter(*data_cols), (now, now)
+        params = [[*get(r), *tail] for r in group]
+        if outcomes_idx is not None:
+            dumps = orjson.dumps
+            for vals in params:
+                o = vals[outcomes_idx]
+                if o is not None and not isinstance(o, str):
+                    vals[outcomes_idx] = dumps(o).decode()
+        await db.executemany(sql, params)
+    return len(rows)
 
 
 async def get_markets_by_status(
     db: aiosqlite.Connection, status: str, platform: str | None = None
-) -> list[dict]:
+) -> list[aiosqlite.Row]:
+    """Markets with *status* (optionally on one *platform*).
+
+    Rows are returned as-is; they support ``row["col"]`` access without
+    copying into a dict.
+    """
     sql = "SELECT * FROM markets WHERE status = ?"
     params: list[Any] = [status]
     if platform:
         sql += " AND platform = ?"
         params.append(platform)
-    rows = await db.execute_fetchall(sql, params)
-    return [dict(r) for r in rows]
+    return list(await db.execute_fetchall(sql, params))
 
 
-async def get_unresolved_past_end(db: aiosqlite.Connection) -> list[dict]:
+async def get_unresolved_past_end(
+    db: aiosqlite.Connection, *, now: str | None = None
+) -> list[aiosqlite.Row]:
     """Markets past end_date that haven't been resolved yet."""
-    now = _now_iso()
+    now = now or _now_iso()
     sql = (
         "SELECT * FROM markets "
         "WHERE status IN ('active', 'closed') "
         "AND end_date IS NOT NULL AND end_date <= ? "
         "ORDER BY end_date"
     )
-    rows = await db.execute_fetchall(sql, [now])
-    return [dict(r) for r in rows]
+    return list(await db.execute_fetchall(sql, [now]))
 
 
 async def mark_resolved(
-    db: aiosqlite.Connection, platform: str, market_id: str, resolution: str
+    db: aiosqlite.Connection, platform: str, market_id: str, resolution: str,
+    *, now: str | None = None,
 ) -> None:
-    now = _now_iso()
+    now = now or _now_iso()
     await db.execute(
         "UPDATE markets SET status = 'resolved', resolution = ?, resolved_at = ?, updated_at = ? "
         "WHERE platform = ? AND market_id = ?",
@@ -163,8 +319,10 @@ async def mark_resolved(
     )
 
 
-async def mark_closed(db: aiosqlite.Connection, platform: str, market_id: str) -> None:
-    now = _now_iso()
+async def mark_closed(
+    db: aiosqlite.Connection, platform: str, market_id: str, *, now: str | None = None
+) -> None:
+    now = now or _now_iso()
     await db.execute(
         "UPDATE markets SET status = 'closed', updated_at = ? "
         "WHERE platform = ? AND market_id = ?",
@@ -172,32 +330,61 @@ async def mark_closed(db: aiosqlite.Connection, platform: str, market_id: str) -
     )
 
 
+async def mark_resolved_bulk(
+    db: aiosqlite.Connection,
+    items: Sequence[tuple[str, str, str]],
+    *,
+    now: str | None = None,
+) -> int:
+    """Resolve many markets at once; *items* are ``(platform, market_id, resolution)``."""
+    if not items:
+        return 0
+    now = now or _now_iso()
+    await db.executemany(
+        "UPDATE markets SET status = 'resolved', resolution = ?, resolved_at = ?, updated_at = ? "
+        "WHERE platform = ? AND market_id = ?",
+        [(res, now, now, platform, mid) for platform, mid, res in items],
+    )
+    return len(items)
+
+
+async def mark_closed_bulk(
+    db: aiosqlite.Connection, items: Sequence[tuple[str, str]], *, now: str | None = None
+) -> int:
+    """Close many markets at once; *items* are ``(platform, market_id)``."""
+    if not items:
+        return 0
+    now = now or _now_iso()
+    await db.executemany(
+        "UPDATE markets SET status = 'closed', updated_at = ? "
+        "WHERE platform = ? AND market_id = ?",
+        [(now, platform, mid) for platform, mid in items],
+    )
+    return len(items)
+
+
 # ---------------------------------------------------------------------------
 # Price snapshots
 # ---------------------------------------------------------------------------
 
-async def insert_snapshot(db: aiosqlite.Connection, **kw: Any) -> None:
-    kw.setdefault("snapshot_at", _now_iso())
-    cols = list(kw.keys())
-    placeholders = ", ".join(["?"] * len(cols))
-    col_names = ", ".join(cols)
-    sql = f"INSERT INTO price_snapshots ({col_names}) VALUES ({placeholders})"
-    await db.execute(sql, list(kw.values()))
+async def insert_snapshot(
+    db: aiosqlite.Connection, *, now: str | None = None, **kw: Any
+) -> None:
+    """Insert one snapshot through the same cached statement as the bulk path."""
+    await insert_snapshots_bulk(db, [kw], now=now)
 
 
 async def insert_snapshots_bulk(
-    db: aiosqlite.Connection, rows: Sequence[dict]
+    db: aiosqlite.Connection, rows: Sequence[dict], *, now: str | None = None
 ) -> int:
     if not rows:
         return 0
-    now = _now_iso()
-    for r in rows:
-        r.setdefault("snapshot_at", now)
-    cols = list(rows[0].keys())
-    placeholders = ", ".join(["?"] * len(cols))
-    col_names = ", ".join(cols)
-    sql = f"INSERT INTO price_snapshots ({col_names}) VALUES ({placeholders})"
-    await db.executemany(sql, [list(r.values()) for r in rows])
+    now = now or _now_iso()
+    params = [
+        tuple([r.get(c) for c in _SNAPSHOT_COLS[:-1]]) + (r.get("snapshot_at") or now,)
+        for r in rows
+    ]
+    await db.executemany(_SNAPSHOT_SQL, params)
     return len(rows)
 
 
@@ -207,11 +394,7 @@ async def insert_snapshots_bulk(
 
 async def insert_news(db: aiosqlite.Connection, **kw: Any) -> None:
     kw.setdefault("captured_at", _now_iso())
-    cols = list(kw.keys())
-    placeholders = ", ".join(["?"] * len(cols))
-    col_names = ", ".join(cols)
-    sql = f"INSERT INTO news_context ({col_names}) VALUES ({placeholders})"
-    await db.execute(sql, list(kw.values()))
+    await db.execute(_insert_sql("news_context", tuple(kw)), list(kw.values()))
 
 
 # ---------------------------------------------------------------------------
@@ -220,17 +403,14 @@ async def insert_news(db: aiosqlite.Connection, **kw: Any) -> None:
 
 async def stats(db: aiosqlite.Connection) -> dict:
     """Return summary counts for the status command."""
-    result: dict[str, Any] = {}
-    for status in ("active", "closed", "resolved"):
-        row = await db.execute_fetchall(
-            "SELECT COUNT(*) AS cnt FROM markets WHERE status = ?", [status]
-        )
-        result[status] = row[0]["cnt"] if row else 0
-
-    row = await db.execute_fetchall("SELECT COUNT(*) AS cnt FROM price_snapshots")
-    result["snapshots"] = row[0]["cnt"] if row else 0
-
-    row = await db.execute_fetchall("SELECT COUNT(*) AS cnt FROM news_context")
-    result["news"] = row[0]["cnt"] if row else 0
-
-    return result
+    rows = await db.execute_fetchall(
+        "SELECT "
+        "COALESCE(SUM(status = 'active'), 0) AS active, "
+        "COALESCE(SUM(status = 'closed'), 0) AS closed, "
+        "COALESCE(SUM(status = 'resolved'), 0) AS resolved, "
+        "(SELECT COUNT(*) FROM price_snapshots) AS snapshots, "
+        "(SELECT COUNT(*) FROM news_context) AS news "
+        "FROM markets"
+    )
+    row = next(iter(rows))
+    return {k: row[k] for k in ("active", "closed", "resolved", "snapshots", "news")}
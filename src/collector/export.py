@@ -17,16 +17,24 @@ Per-market aggregates computed for XGBoost:
 
 from __future__ import annotations
 
-import json
+import asyncio
+import functools
 import logging
-import math
+import multiprocessing
 import os
-import sqlite3
-import statistics
+import re
+from bisect import bisect_left
+from collections import Counter, defaultdict
+from collections.abc import Callable, Iterator
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import ExitStack
 from datetime import datetime, timezone
+from operator import itemgetter
 from pathlib import Path
 from typing import Any
 
+import numpy as np
+import orjson
 import pyarrow as pa
 import pyarrow.parquet as pq
 
@@ -41,173 +49,285 @@ log = logging.getLogger(__name__)
 
 async def export_parquet(
     db, cfg: Config, *, category: str | None = None, platform: str | None = None,
+    collected: _Collected | None = None,
 ) -> str:
     """Export resolved markets + snapshots + wwatcher alerts to Parquet.
 
     Optional *category* and *platform* filters narrow the export so you can
-    produce training sets for specific domains (e.g. weather-only).
+    produce training sets for specific domains (e.g. weather-only).  Pass
+    *collected* (from :func:`_collect`) to reuse inputs already loaded for
+    another exporter; otherwise snapshots and news are streamed per row group.
     """
-    output_dir = Path(cfg.export.output_dir)
-    output_dir.mkdir(parents=True, exist_ok=True)
-    ts = datetime.now(timezone.utc).strftime("%Y%m%d_%H%M%S")
-    suffix = ""
-    if category:
-        suffix += f"_{_slug(category)}"
-    if platform:
-        suffix += f"_{platform}"
-    out_path = str(output_dir / f"resolved_{ts}{suffix}.parquet")
-
-    # Fetch resolved markets with optional filters.
-    sql = "SELECT * FROM markets WHERE status = 'resolved' AND resolution IS NOT NULL"
-    params: list[Any] = []
-    if category:
-        sql += " AND category LIKE ?"
-        params.append(f"%{category}%")
-    if platform:
-        sql += " AND platform = ?"
-        params.append(platform)
-    rows = await db.execute_fetchall(sql, params)
-    markets = [dict(r) for r in rows]
+    out_path = _out_path(cfg, "resolved", "parquet", category, platform)
+
+    if collected is None:
+        markets = await _resolved_markets(db, category, platform)
+        price_map = news_map = None
+        whale_map = (
+            await _load_wwatcher_alerts(db, cfg.export.wwatcher_db_path, markets)
+            if markets else {}
+        )
+    else:
+        markets, price_map, news_map, whale_map = collected
     if not markets:
         log.warning("No resolved markets to export")
         return out_path
 
-    # Fetch price histories per market.
-    price_map: dict[str, list[dict]] = {}
-    for mkt in markets:
-        mid = mkt["market_id"]
-        snap_rows = await db.execute_fetchall(
-            "SELECT yes_price, no_price, volume, liquidity, spread, snapshot_at "
-            "FROM price_snapshots WHERE market_id = ? ORDER BY snapshot_at",
-            [mid],
-        )
-        price_map[mid] = [dict(r) for r in snap_rows]
+    # Per-market features are CPU-bound and independent, so large exports fan
+    # them out to worker processes; Arrow assembly stays in this process.
+    pool = None
+    if len(markets) >= _PARALLEL_MIN_MARKETS:
+        pool = ProcessPoolExecutor(mp_context=multiprocessing.get_context("spawn"))
+
+    # Stream in batches: only one chunk of price/news rows is held as Python
+    # objects at a time; finished batches wait as Arrow data until a full
+    # row group is ready.
+    writer = pq.ParquetWriter(out_path, _PARQUET_SCHEMA, **_PARQUET_WRITE_OPTS)
+    pending: list[pa.RecordBatch] = []
+    try:
+        for i in range(0, len(markets), _PARQUET_BATCH):
+            chunk = markets[i:i + _PARQUET_BATCH]
+            if collected is None:
+                price_map, news_map = await _fetch_inputs(db, chunk)
+            pending.append(await asyncio.to_thread(
+                _build_batch, pool, chunk, price_map, whale_map, news_map,
+            ))
+            if sum(b.num_rows for b in pending) >= _PARQUET_ROW_GROUP:
+                await asyncio.to_thread(_flush_row_group, writer, pending)
+                pending = []
+        if pending:
+            await asyncio.to_thread(_flush_row_group, writer, pending)
+    finally:
+        writer.close()
+        if pool is not None:
+            pool.shutdown()
+    log.info("Exported %d resolved markets to %s", len(markets), out_path)
+    return out_path
 
-    # Fetch news headlines.
-    news_map: dict[str, list[dict]] = {}
-    for mkt in markets:
-        mid = mkt["market_id"]
-        news_rows = await db.execute_fetchall(
-            "SELECT headline, source, captured_at "
-            "FROM news_context WHERE market_id = ? ORDER BY captured_at",
-            [mid],
-        )
-        news_map[mid] = [dict(r) for r in news_rows]
 
-    # Link wwatcher alerts (optional).
-    whale_map = _load_wwatcher_alerts(cfg.export.wwatcher_db_path, markets)
+def _build_batch(
+    pool: ProcessPoolExecutor | None,
+    chunk: list[dict],
+    price_map: dict[str, list[tuple]],
+    whale_map: dict[str, list[dict]],
+    news_map: dict[str, list[dict]],
+) -> pa.RecordBatch:
+    """Compute the rows for *chunk* as one Arrow record batch."""
+    mids = [mkt["market_id"] for mkt in chunk]
+    args = (
+        chunk,
+        [price_map.get(mid, []) for mid in mids],
+        [whale_map.get(mid, []) for mid in mids],
+        [news_map.get(mid, []) for mid in mids],
+    )
+    # Rows are tuples in _PARQUET_SCHEMA order; transpose into columns.
+    if pool is None:
+        rows = list(map(_parquet_row, *args))
+    else:
+        rows = list(pool.map(_parquet_row, *args, chunksize=64))
+    arrays = [
+        pa.array(col, type=field.type)
+        for col, field in zip(zip(*rows), _PARQUET_SCHEMA)
+    ]
+    return pa.RecordBatch.from_arrays(arrays, schema=_PARQUET_SCHEMA)
+
+
+def _flush_row_group(writer: pq.ParquetWriter, batches: list[pa.RecordBatch]) -> None:
+    writer.write_table(pa.Table.from_batches(batches), row_group_size=_PARQUET_ROW_GROUP)
+
+
+_PARQUET_BATCH = 1024  # markets per computed batch
+_PARQUET_ROW_GROUP = 8 * _PARQUET_BATCH  # rows per Parquet row group
+_PARALLEL_MIN_MARKETS = 4 * _PARQUET_BATCH  # below this, worker start-up dominates
+
+# Price snapshots are carried as plain tuples in this column order (no
+# per-row dict); the Parquet struct below uses the same field order.
+_PRICE_COLS = ("yes_price", "no_price", "volume", "liquidity", "spread", "snapshot_at")
+_P_YES, _P_NO, _P_VOLUME, _P_LIQUIDITY, _P_SPREAD, _P_AT = range(len(_PRICE_COLS))
+
+_PRICE_STRUCT = pa.struct([
+    ("yes_price", pa.float64()),
+    ("no_price", pa.float64()),
+    ("volume", pa.float64()),
+    ("liquidity", pa.float64()),
+    ("spread", pa.float64()),
+    ("snapshot_at", pa.string()),
+])
+
+_NEWS_STRUCT = pa.struct([
+    ("headline", pa.string()),
+    ("source", pa.string()),
+    ("captured_at", pa.string()),
+])
+
+_PARQUET_SCHEMA = pa.schema([
+    # identifiers
+    ("market_id", pa.string()),
+    ("platform", pa.string()),
+    ("title", pa.string()),
+    ("category", pa.string()),
+    ("outcomes", pa.string()),
+
+    # label
+    ("resolution", pa.string()),
+    ("resolved_at", pa.string()),
+
+    # market fundamentals
+    ("volume", pa.float64()),
+    ("liquidity", pa.float64()),
+    ("end_date", pa.string()),
+    ("price_at_open", pa.float64()),
+    ("price_at_close", pa.float64()),
+    ("price_move", pa.float64()),
+    ("market_consensus_at_close", pa.float64()),
+    ("days_to_resolution", pa.float64()),
+
+    # price time-series features
+    ("price_mean", pa.float64()),
+    ("price_std", pa.float64()),
+    ("price_min", pa.float64()),
+    ("price_max", pa.float64()),
+    ("price_trend", pa.float64()),
+    ("volume_mean", pa.float64()),
+    ("volume_max", pa.float64()),
+    ("spread_mean", pa.float64()),
+    ("snapshot_count", pa.int64()),
+
+    # whale features (XGBoost-ready)
+    ("whale_count", pa.int64()),
+    ("whale_correct_count", pa.int64()),
+    ("whale_incorrect_count", pa.int64()),
+    ("whale_accuracy", pa.float64()),
+    ("whale_net_direction", pa.string()),
+    ("whale_consensus_correct", pa.bool_()),
+    ("whale_consensus_strength", pa.float64()),
+    ("whale_total_value", pa.float64()),
+    ("whale_avg_value", pa.float64()),
+    ("whale_max_value", pa.float64()),
+    ("whale_avg_entry_price", pa.float64()),
+    ("whale_avg_win_rate", pa.float64()),
+    ("whale_avg_profit_per_unit", pa.float64()),
+    ("whale_unique_wallets", pa.int64()),
+    ("whale_repeat_actors", pa.int64()),
+
+    # raw data for deeper analysis / LLM context.  Snapshots and news are
+    # native nested columns; whale alerts stay JSON because their fields
+    # follow whatever schema the external wwatcher DB has.
+    ("price_history", pa.list_(_PRICE_STRUCT)),
+    ("whale_alerts", pa.large_string()),
+    ("news_headlines", pa.list_(_NEWS_STRUCT)),
+])
+
+_PARQUET_WRITE_OPTS: dict[str, Any] = {
+    "compression": "zstd",
+    "compression_level": 3,
+    # Only low-cardinality strings benefit; long JSON/text columns don't.
+    "use_dictionary": ["platform", "category", "resolution", "whale_net_direction"],
+    "data_page_size": 1 << 20,
+    "write_statistics": True,
+}
+
+
+_TS_FEATURE_VALUES = itemgetter(
+    "mean", "std", "min", "max", "trend", "volume_mean", "volume_max", "spread_mean", "count",
+)
+_WHALE_STAT_VALUES = itemgetter(
+    "count", "correct_count", "incorrect_count", "accuracy", "net_direction",
+    "consensus_correct", "consensus_strength", "total_value", "avg_value", "max_value",
+    "avg_entry_price", "avg_win_rate", "avg_profit_per_unit", "unique_wallets", "repeat_actors",
+)
 
-    # Build rows.
-    records: list[dict[str, Any]] = []
-    for mkt in markets:
-        mid = mkt["market_id"]
-        resolution = mkt["resolution"]
-        prices = price_map.get(mid, [])
-        first_price = prices[0]["yes_price"] if prices else None
-        last_price = prices[-1]["yes_price"] if prices else None
-
-        # --- Enrich whale alerts with correctness + profit ---
-        raw_alerts = whale_map.get(mid, [])
-        enriched_alerts = _enrich_alerts(raw_alerts, resolution, prices)
-
-        # --- Per-market whale aggregates for XGBoost ---
-        whale_stats = _compute_whale_stats(enriched_alerts, resolution)
-
-        # --- Price time-series features ---
-        ts_features = _compute_price_features(prices)
-
-        records.append(dict(
-            # identifiers
-            market_id=mid,
-            platform=mkt["platform"],
-            title=mkt["title"],
-            category=mkt.get("category", ""),
-            outcomes=mkt.get("outcomes", ""),
-
-            # label
-            resolution=resolution,
-            resolved_at=mkt.get("resolved_at"),
-
-            # market fundamentals
-            volume=mkt.get("volume"),
-            liquidity=mkt.get("liquidity"),
-            end_date=mkt.get("end_date"),
-            price_at_open=first_price,
-            price_at_close=last_price,
-            price_move=_safe_sub(last_price, first_price),
-            market_consensus_at_close=last_price,
-            days_to_resolution=_days_to_resolution(mkt),
-
-            # price time-series features
-            price_mean=ts_features["mean"],
-            price_std=ts_features["std"],
-            price_min=ts_features["min"],
-            price_max=ts_features["max"],
-            price_trend=ts_features["trend"],
-            volume_mean=ts_features["volume_mean"],
-            volume_max=ts_features["volume_max"],
-            spread_mean=ts_features["spread_mean"],
-            snapshot_count=ts_features["count"],
-
-            # whale features (XGBoost-ready)
-            whale_count=whale_stats["count"],
-            whale_correct_count=whale_stats["correct_count"],
-            whale_incorrect_count=whale_stats["incorrect_count"],
-            whale_accuracy=whale_stats["accuracy"],
-            whale_net_direction=whale_stats["net_direction"],
-            whale_consensus_correct=whale_stats["consensus_correct"],
-            whale_consensus_strength=whale_stats["consensus_strength"],
-            whale_total_value=whale_stats["total_value"],
-            whale_avg_value=whale_stats["avg_value"],
-            whale_max_value=whale_stats["max_value"],
-            whale_avg_entry_price=whale_stats["avg_entry_price"],
-            whale_avg_win_rate=whale_stats["avg_win_rate"],
-            whale_avg_profit_per_unit=whale_stats["avg_profit_per_unit"],
-            whale_unique_wallets=whale_stats["unique_wallets"],
-            whale_repeat_actors=whale_stats["repeat_actors"],
-
-            # raw data (JSON blobs for deeper analysis / LLM context)
-            price_history=json.dumps(prices),
-            whale_alerts=json.dumps(enriched_alerts),
-            news_headlines=json.dumps(news_map.get(mid, [])),
-        ))
-
-    table = pa.Table.from_pylist(records)
-    pq.write_table(table, out_path)
-    log.info("Exported %d resolved markets to %s", len(records), out_path)
-    return out_path
+
+def _parquet_row(
+    mkt: dict, prices: list[tuple], raw_alerts: list[dict], news: list[dict],
+) -> tuple:
+    """Compute one market's Parquet row, in ``_PARQUET_SCHEMA`` column order."""
+    get = mkt.get
+    resolution = mkt["resolution"]
+    resolved_at = get("resolved_at")
+    end_date = get("end_date")
+    first_price = prices[0][_P_YES] if prices else None
+    last_price = prices[-1][_P_YES] if prices else None
+
+    # --- Enrich whale alerts with correctness + profit ---
+    enriched_alerts = _enrich_alerts(raw_alerts, resolution, prices)
+
+    # --- Per-market whale aggregates for XGBoost ---
+    whale_stats = _compute_whale_stats(enriched_alerts, resolution)
+
+    # --- Price time-series features ---
+    ts_features = _snapshot_features(prices)
+
+    return (
+        # identifiers
+        mkt["market_id"],
+        mkt["platform"],
+        mkt["title"],
+        get("category", ""),
+        get("outcomes", ""),
+
+        # label
+        resolution,
+        resolved_at,
+
+        # market fundamentals
+        get("volume"),
+        get("liquidity"),
+        end_date,
+        first_price,
+        last_price,
+        _safe_sub(last_price, first_price),
+        last_price,
+        _days_to_resolution(end_date, resolved_at),
+
+        # price time-series features
+        *_TS_FEATURE_VALUES(ts_features),
+
+        # whale features (XGBoost-ready)
+        *_WHALE_STAT_VALUES(whale_stats),
+
+        # raw data
+        prices,
+        orjson.dumps(enriched_alerts).decode(),
+        news,
+    )
 
 
 # ------------------------------------------------------------------
 # Prompt export (Turtel et al. format for GRPO)
 # ------------------------------------------------------------------
 
-async def _fetch_causal_context(
-    db, mkt: dict, whale_map: dict[str, list[dict]],
+async def _fetch_inputs(
+    db, markets: list[dict],
+) -> tuple[dict[str, list[tuple]], dict[str, list[dict]]]:
+    """Bulk-load the price snapshots (as ``_PRICE_COLS`` tuples) and news rows."""
+    mids = [m["market_id"] for m in markets]
+    price_map = await _fetch_grouped(
+        db, "price_snapshots", ", ".join(_PRICE_COLS), mids, "snapshot_at", as_tuples=True,
+    )
+    news_map = await _fetch_grouped(
+        db, "news_context", "headline, source, captured_at", mids, "captured_at",
+    )
+    return price_map, news_map
+
+
+def _causal_context(
+    mkt: dict,
+    price_map: dict[str, list[tuple]],
+    news_map: dict[str, list[dict]],
+    whale_map: dict[str, list[dict]],
 ) -> dict:
-    """Gather causally-masked context for a single market (shared by GRPO & SFT)."""
+    """Build causally-masked context for a single market (shared by GRPO & SFT)."""
     mid = mkt["market_id"]
     resolved_at = mkt.get("resolved_at")
 
-    # --- Price history (pre-resolution only) ---
-    snap_rows = await db.execute_fetchall(
-        "SELECT yes_price, no_price, volume, spread, snapshot_at "
-        "FROM price_snapshots WHERE market_id = ? "
-        "AND snapshot_at < COALESCE(?, snapshot_at) "
-        "ORDER BY snapshot_at",
-        [mid, resolved_at],
-    )
-    price_history = [dict(r) for r in snap_rows]
-
-    # --- News (pre-resolution only) ---
-    news_rows = await db.execute_fetchall(
-        "SELECT headline, source, captured_at "
-        "FROM news_context WHERE market_id = ? "
-        "AND captured_at < COALESCE(?, captured_at) "
-        "ORDER BY captured_at",
-        [mid, resolved_at],
-    )
-    news = [dict(r) for r in news_rows]
+    # --- Price history + news (pre-resolution only; none if resolved_at unknown) ---
+    if resolved_at:
+        price_history = [s for s in price_map.get(mid, []) if s[_P_AT] < resolved_at]
+        news = [n for n in news_map.get(mid, []) if n["captured_at"] < resolved_at]
+    else:
+        price_history = []
+        news = []
 
     # --- Whale alerts (strip correctness — model must predict) ---
     raw_alerts = whale_map.get(mid, [])
@@ -225,21 +345,19 @@ async def _fetch_causal_context(
         masked_alerts.append(masked)
 
     # --- Summary stats the model can reason over ---
-    ts_features = _compute_price_features(
-        [{"yes_price": s.get("yes_price"), "volume": s.get("volume"),
-          "spread": s.get("spread")} for s in price_history]
-    )
+    ts_features = _snapshot_features(price_history)
 
     whale_sides = [a.get("side", "").upper() for a in masked_alerts if a.get("side")]
     yes_whales = sum(1 for s in whale_sides if s == "YES")
     no_whales = len(whale_sides) - yes_whales
 
     return {
+        "title": mkt["title"],
         "platform": mkt["platform"],
         "category": mkt.get("category", ""),
         "volume": mkt.get("volume"),
         "liquidity": mkt.get("liquidity"),
-        "current_yes_price": price_history[-1]["yes_price"] if price_history else None,
+        "current_yes_price": price_history[-1][_P_YES] if price_history else None,
         "price_trend": ts_features["trend"],
         "price_mean": ts_features["mean"],
         "price_history": price_history,
@@ -248,16 +366,37 @@ async def _fetch_causal_context(
         "whale_no_count": no_whales,
         "whale_alerts": masked_alerts,
         "news_headlines": news,
+        "headlines_text": _headlines_text(news),
     }
 
 
+_MAX_PROMPT_HEADLINES = 20
+
+
+def _headlines_text(news: list[dict]) -> str:
+    """Bulleted list of the most recent headlines for prompt text."""
+    recent = news[-_MAX_PROMPT_HEADLINES:]
+    return "".join(f"\n- {n.get('headline') or ''}" for n in recent) or " (none)"
+
+
+_JSONL_BUFFER = 1 << 20  # bytes; JSONL exports are written in large chunks
+
+
+_RESOLUTION_INT = {"YES": 1, "NO": 0}
+
+
 def _resolution_to_int(resolution: str) -> int:
     """Convert resolution string to integer (1=YES, 0=NO)."""
-    return 1 if resolution.upper() == "YES" else 0
+    # Stored resolutions are already upper-case; only other spellings pay for .upper().
+    value = _RESOLUTION_INT.get(resolution)
+    if value is None:
+        value = _RESOLUTION_INT.get(resolution.upper(), 0)
+    return value
 
 
 async def export_prompts(
     db, cfg: Config, *, category: str | None = None, platform: str | None = None,
+    collected: _Collected | None = None,
 ) -> str:
     """Export GRPO prompt format (matches prowl-bot plan).
 
@@ -265,52 +404,32 @@ async def export_prompts(
     Context is causally masked: only data from *before* resolution is
     included so the model can't cheat.
     """
-    output_dir = Path(cfg.export.output_dir)
-    output_dir.mkdir(parents=True, exist_ok=True)
-    ts = datetime.now(timezone.utc).strftime("%Y%m%d_%H%M%S")
-    suffix = ""
-    if category:
-        suffix += f"_{_slug(category)}"
-    if platform:
-        suffix += f"_{platform}"
-    out_path = str(output_dir / f"grpo_{ts}{suffix}.jsonl")
+    out_path = _out_path(cfg, "grpo", "jsonl", category, platform)
+    if collected is None:
+        collected = await _collect(db, cfg, category=category, platform=platform)
+    await asyncio.to_thread(_write_jsonl, [(out_path, _grpo_record)], collected)
 
-    sql = "SELECT * FROM markets WHERE status = 'resolved' AND resolution IS NOT NULL"
-    params: list[Any] = []
-    if category:
-        sql += " AND category LIKE ?"
-        params.append(f"%{category}%")
-    if platform:
-        sql += " AND platform = ?"
-        params.append(platform)
-    rows = await db.execute_fetchall(sql, params)
-    markets = [dict(r) for r in rows]
-
-    whale_map = _load_wwatcher_alerts(cfg.export.wwatcher_db_path, markets)
-
-    with open(out_path, "w") as fh:
-        for mkt in markets:
-            ctx = await _fetch_causal_context(db, mkt, whale_map)
-
-            record = {
-                "prompt": (
-                    f"Market: {mkt['title']}\n"
-                    f"Price: {ctx['current_yes_price']}\n"
-                    f"Platform: {ctx['platform']}\n"
-                    f"Category: {ctx['category']}\n"
-                    f"Volume: {ctx['volume']}\n"
-                    f"Whale consensus: {ctx['whale_yes_count']} YES / {ctx['whale_no_count']} NO\n"
-                    f"Price trend: {ctx['price_trend']}\n"
-                    f"Headlines: {json.dumps([h.get('headline', '') for h in ctx['news_headlines']])}"
-                ),
-                "outcome": _resolution_to_int(mkt["resolution"]),
-            }
-            fh.write(json.dumps(record) + "\n")
-
-    log.info("Exported %d GRPO prompts to %s", len(markets), out_path)
+    log.info("Exported %d GRPO prompts to %s", len(collected[0]), out_path)
     return out_path
 
 
+def _grpo_record(mkt: dict, ctx: dict) -> dict:
+    """One GRPO prompt record for *mkt*."""
+    return {
+        "prompt": (
+            f"Market: {mkt['title']}\n"
+            f"Price: {ctx['current_yes_price']}\n"
+            f"Platform: {ctx['platform']}\n"
+            f"Category: {ctx['category']}\n"
+            f"Volume: {ctx['volume']}\n"
+            f"Whale consensus: {ctx['whale_yes_count']} YES / {ctx['whale_no_count']} NO\n"
+            f"Price trend: {ctx['price_trend']}\n"
+            f"Headlines:{ctx['headlines_text']}"
+        ),
+        "outcome": _resolution_to_int(mkt["resolution"]),
+    }
+
+
 # ------------------------------------------------------------------
 # SFT export (MLX chat format)
 # ------------------------------------------------------------------
@@ -322,9 +441,31 @@ _SFT_SYSTEM_PROMPT = (
     "give your probability inside <prediction>...</prediction> tags."
 )
 
+# Filled from the _causal_context dict.
+_SFT_USER_TEMPLATE = (
+    "Market: {title}\n"
+    "Price: {current_yes_price}\n"
+    "Platform: {platform}\n"
+    "Category: {category}\n"
+    "Volume: {volume}\n"
+    "Liquidity: {liquidity}\n"
+    "Whale activity: {whale_count} trades ({whale_yes_count} YES / {whale_no_count} NO)\n"
+    "Price trend: {price_trend}\n"
+    "Price mean: {price_mean}\n"
+    "Headlines:{headlines_text}"
+)
+
+_SFT_ASSISTANT_TEMPLATE = (
+    "<think>Based on whale activity showing {whale_yes_count} YES / {whale_no_count} NO "
+    "positions and a price trend of {price_trend}, "
+    "the market is leaning toward {resolution_word}.</think>\n"
+    "<prediction>{prob:.2f}</prediction>"
+)
+
 
 async def export_sft(
     db, cfg: Config, *, category: str | None = None, platform: str | None = None,
+    collected: _Collected | None = None,
 ) -> str:
     """Export SFT training data in MLX chat format (matches prowl-bot plan).
 
@@ -336,16 +477,122 @@ async def export_sft(
             {"role": "assistant", "content": "<think>...</think>\n<prediction>0.72</prediction>"}
         ]}
     """
-    output_dir = Path(cfg.export.output_dir)
-    output_dir.mkdir(parents=True, exist_ok=True)
-    ts = datetime.now(timezone.utc).strftime("%Y%m%d_%H%M%S")
-    suffix = ""
-    if category:
-        suffix += f"_{_slug(category)}"
-    if platform:
-        suffix += f"_{platform}"
-    out_path = str(output_dir / f"sft_{ts}{suffix}.jsonl")
+    out_path = _out_path(cfg, "sft", "jsonl", category, platform)
+    if collected is None:
+        collected = await _collect(db, cfg, category=category, platform=platform)
+    await asyncio.to_thread(_write_jsonl, [(out_path, _sft_record)], collected)
 
+    log.info("Exported %d SFT examples to %s", len(collected[0]), out_path)
+    return out_path
+
+
+def _sft_record(mkt: dict, ctx: dict) -> dict:
+    """One SFT chat record for *mkt*."""
+    outcome_int = _resolution_to_int(mkt["resolution"])
+
+    # Build a plausible assistant response anchored to the actual outcome.
+    prob = 1.0 if outcome_int == 1 else 0.0
+    # Use the market's price as a more realistic probability when available.
+    if ctx["current_yes_price"] is not None:
+        # Nudge toward the true outcome (the model should be more confident
+        # than the market, since it has the whale signal).
+        mkt_price = ctx["current_yes_price"]
+        if outcome_int == 1:
+            prob = max(mkt_price, 0.70)  # confident YES
+        else:
+            prob = min(mkt_price, 0.30)  # confident NO
+
+    assistant_content = _SFT_ASSISTANT_TEMPLATE.format(
+        whale_yes_count=ctx["whale_yes_count"],
+        whale_no_count=ctx["whale_no_count"],
+        price_trend=ctx["price_trend"],
+        resolution_word="YES" if outcome_int == 1 else "NO",
+        prob=prob,
+    )
+    return {
+        "messages": [
+            {"role": "system", "content": _SFT_SYSTEM_PROMPT},
+            {"role": "user", "content": _SFT_USER_TEMPLATE.format_map(ctx)},
+            {"role": "assistant", "content": assistant_content},
+        ]
+    }
+
+
+# ------------------------------------------------------------------
+# Shared inputs
+# ------------------------------------------------------------------
+
+# (markets, price_map, news_map, whale_map) as returned by _collect.
+_Collected = tuple[
+    list[dict], dict[str, list[tuple]], dict[str, list[dict]], dict[str, list[dict]],
+]
+
+
+async def export_all(
+    db, cfg: Config, *, category: str | None = None, platform: str | None = None,
+) -> dict[str, str]:
+    """Run the Parquet, GRPO and SFT exports over a single load of the inputs.
+
+    Returns the output path of each format keyed by its ``--format`` name.
+    """
+    collected = await _collect(db, cfg, category=category, platform=platform)
+    paths = {
+        "parquet": await export_parquet(
+            db, cfg, category=category, platform=platform, collected=collected,
+        ),
+        "grpo": _out_path(cfg, "grpo", "jsonl", category, platform),
+        "sft": _out_path(cfg, "sft", "jsonl", category, platform),
+    }
+    # GRPO and SFT share one causal-context pass over the markets.
+    await asyncio.to_thread(
+        _write_jsonl, [(paths["grpo"], _grpo_record), (paths["sft"], _sft_record)], collected,
+    )
+    log.info("Exported %d GRPO prompts to %s", len(collected[0]), paths["grpo"])
+    log.info("Exported %d SFT examples to %s", len(collected[0]), paths["sft"])
+    return paths
+
+
+def _iter_causal_contexts(collected: _Collected) -> Iterator[tuple[dict, dict]]:
+    """Yield ``(market, causal context)`` once per collected market."""
+    markets, price_map, news_map, whale_map = collected
+    for mkt in markets:
+        yield mkt, _causal_context(mkt, price_map, news_map, whale_map)
+
+
+def _write_jsonl(
+    targets: list[tuple[str, Callable[[dict, dict], dict]]], collected: _Collected,
+) -> None:
+    """Write one record per market to each ``(path, record_fn)`` target.
+
+    The causal context is built once per market and shared by every target.
+    Runs in a worker thread.
+    """
+    with ExitStack() as stack:
+        outputs = [
+            (stack.enter_context(open(path, "wb", buffering=_JSONL_BUFFER)), record_fn)
+            for path, record_fn in targets
+        ]
+        for mkt, ctx in _iter_causal_contexts(collected):
+            for fh, record_fn in outputs:
+                fh.write(orjson.dumps(record_fn(mkt, ctx), option=orjson.OPT_APPEND_NEWLINE))
+
+
+async def _collect(
+    db, cfg: Config, *, category: str | None = None, platform: str | None = None,
+) -> _Collected:
+    """Load resolved markets and their snapshots, news and whale alerts once."""
+    markets = await _resolved_markets(db, category, platform)
+    if not markets:
+        return markets, {}, {}, {}
+    whale_map = await _load_wwatcher_alerts(db, cfg.export.wwatcher_db_path, markets)
+    price_map, news_map = await _fetch_inputs(db, markets)
+    return markets, price_map, news_map, whale_map
+
+
+async def _resolved_markets(
+    db, category: str | None, platform: str | None,
+) -> list[dict]:
+    """Resolved markets, optionally filtered by category and platform."""
     sql = "SELECT * FROM markets WHERE status = 'resolved' AND resolution IS NOT NULL"
     params: list[Any] = []
     if category:
@@ -355,61 +602,58 @@ async def export_sft(
         sql += " AND platform = ?"
         params.append(platform)
     rows = await db.execute_fetchall(sql, params)
-    markets = [dict(r) for r in rows]
-
-    whale_map = _load_wwatcher_alerts(cfg.export.wwatcher_db_path, markets)
-
-    with open(out_path, "w") as fh:
-        for mkt in markets:
-            ctx = await _fetch_causal_context(db, mkt, whale_map)
-            outcome_int = _resolution_to_int(mkt["resolution"])
-
-            user_content = (
-                f"Market: {mkt['title']}\n"
-                f"Price: {ctx['current_yes_price']}\n"
-                f"Platform: {ctx['platform']}\n"
-                f"Category: {ctx['category']}\n"
-                f"Volume: {ctx['volume']}\n"
-                f"Liquidity: {ctx['liquidity']}\n"
-                f"Whale activity: {ctx['whale_count']} trades "
-                f"({ctx['whale_yes_count']} YES / {ctx['whale_no_count']} NO)\n"
-                f"Price trend: {ctx['price_trend']}\n"
-                f"Price mean: {ctx['price_mean']}\n"
-                f"Headlines: {json.dumps([h.get('headline', '') for h in ctx['news_headlines']])}"
-            )
+    return [dict(r) for r in rows]
 
-            # Build a plausible assistant response anchored to the actual outcome.
-            prob = 1.0 if outcome_int == 1 else 0.0
-            # Use the market's price as a more realistic probability when available.
-            if ctx["current_yes_price"] is not None:
-                # Nudge toward the true outcome (the model should be more confident
-                # than the market, since it has the whale signal).
-                mkt_price = ctx["current_yes_price"]
-                if outcome_int == 1:
-                    prob = max(mkt_price, 0.70)  # confident YES
-                else:
-                    prob = min(mkt_price, 0.30)  # confident NO
-
-            resolution_word = "YES" if outcome_int == 1 else "NO"
-            assistant_content = (
-                f"<think>Based on whale activity showing "
-                f"{ctx['whale_yes_count']} YES / {ctx['whale_no_count']} NO "
-                f"positions and a price trend of {ctx['price_trend']}, "
-                f"the market is leaning toward {resolution_word}.</think>\n"
-                f"<prediction>{prob:.2f}</prediction>"
-            )
 
-            record = {
-                "messages": [
-                    {"role": "system", "content": _SFT_SYSTEM_PROMPT},
-                    {"role": "user", "content": user_content},
-                    {"role": "assistant", "content": assistant_content},
-                ]
-            }
-            fh.write(json.dumps(record) + "\n")
+def _out_path(
+    cfg: Config, prefix: str, ext: str, category: str | None, platform: str | None,
+) -> str:
+    """Timestamped output path in the export directory (created if missing)."""
+    output_dir = Path(cfg.export.output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    ts = datetime.now(timezone.utc).strftime("%Y%m%d_%H%M%S")
+    suffix = ""
+    if category:
+        suffix += f"_{_slug(category)}"
+    if platform:
+        suffix += f"_{platform}"
+    return str(output_dir / f"{prefix}_{ts}{suffix}.{ext}")
 
-    log.info("Exported %d SFT examples to %s", len(markets), out_path)
-    return out_path
+
+# ------------------------------------------------------------------
+# Bulk per-market fetches
+# ------------------------------------------------------------------
+
+_IN_CHUNK = 900  # stay below SQLite's host-parameter limit on older builds
+
+
+async def _fetch_grouped(
+    db, table: str, cols: str, mids: list[str], order_col: str, *, as_tuples: bool = False,
+) -> dict[str, list]:
+    """Fetch *cols* from *table* for many markets, grouped by market_id.
+
+    One ``IN (...)`` query per chunk of ids replaces a query per market.
+    Rows are dicts, or with *as_tuples* bare tuples in *cols* order.
+    """
+    grouped: dict[str, list] = defaultdict(list)
+    for i in range(0, len(mids), _IN_CHUNK):
+        chunk = mids[i:i + _IN_CHUNK]
+        placeholders = ", ".join(["?"] * len(chunk))
+        async with db.execute(
+            f"SELECT market_id, {cols} FROM {table} "
+            f"WHERE market_id IN ({placeholders}) "
+            f"ORDER BY market_id, {order_col}",
+            chunk,
+        ) as cursor:
+            if as_tuples:
+                cursor.row_factory = None
+                for r in await cursor.fetchall():
+                    grouped[r[0]].append(r[1:])
+            else:
+                for r in await cursor.fetchall():
+                    d = dict(r)
+                    grouped[d.pop("market_id")].append(d)
+    return grouped
 
 
 # ------------------------------------------------------------------
@@ -417,44 +661,49 @@ async def export_sft(
 # ------------------------------------------------------------------
 
 def _enrich_alerts(
-    alerts: list[dict], resolution: str, prices: list[dict]
+    alerts: list[dict], resolution: str, prices: list[tuple]
 ) -> list[dict]:
-    """Tag each whale alert with correctness and estimated profit."""
+    """Tag each whale alert with correctness and estimated profit.
+
+    Each alert is copied once, with the three derived keys added in the same
+    dict display; the input dicts are never mutated.
+    """
     enriched = []
+    index: tuple[list[float], list[float | None]] | None = None
     for a in alerts:
-        a = dict(a)  # don't mutate original
-
         side = (a.get("side") or "").strip().upper()
-        if side in ("YES", "NO"):
-            a["correct"] = side == resolution
-        else:
-            a["correct"] = None
+        correct = side == resolution if side in ("YES", "NO") else None
 
         # Estimate profit: if whale bought YES at entry_price and it resolved YES,
         # profit per unit = 1.0 - entry_price.  If it resolved NO, loss = -entry_price.
-        entry_price = _get_entry_price(a, prices)
-        a["entry_price"] = entry_price
-        if entry_price is not None and side in ("YES", "NO"):
-            if side == "YES":
-                a["profit_per_unit"] = (1.0 - entry_price) if resolution == "YES" else -entry_price
-            else:  # side == NO
-                # Bought NO at (1 - yes_price), pays 1.0 if NO wins.
-                no_entry = 1.0 - entry_price
-                a["profit_per_unit"] = (1.0 - no_entry) if resolution == "NO" else -no_entry
+        entry_price = _get_entry_price(a)
+        if entry_price is None:
+            alert_ts = a.get("created_at") or a.get("timestamp")
+            if alert_ts and prices:
+                if index is None:  # built once per market, only when needed
+                    index = _price_index(prices)
+                entry_price = _nearest_price(_ts_ord(alert_ts), index)
+        if entry_price is not None and side == "YES":
+            profit = (1.0 - entry_price) if resolution == "YES" else -entry_price
+        elif entry_price is not None and side == "NO":
+            # Bought NO at (1 - yes_price), pays 1.0 if NO wins.
+            no_entry = 1.0 - entry_price
+            profit = (1.0 - no_entry) if resolution == "NO" else -no_entry
         else:
-            a["profit_per_unit"] = None
+            profit = None
 
-        enriched.append(a)
+        enriched.append(
+            {**a, "correct": correct, "entry_price": entry_price, "profit_per_unit": profit}
+        )
     return enriched
 
 
-def _get_entry_price(alert: dict, prices: list[dict]) -> float | None:
-    """Get the yes_price at the time of the whale's trade.
+def _get_entry_price(alert: dict) -> float | None:
+    """Get the yes_price the whale traded at from the alert's own 'price' field.
 
-    Uses the alert's own 'price' field if available, otherwise interpolates
-    from the nearest price snapshot.
+    Returns ``None`` when the alert carries no usable price; callers then fall
+    back to the nearest price snapshot.
     """
-    # Prefer the alert's own price field (normalised to 0-1).
     raw_price = alert.get("price")
     if raw_price is not None:
         try:
@@ -462,33 +711,47 @@ def _get_entry_price(alert: dict, prices: list[dict]) -> float | None:
             return p / 100.0 if p > 1.0 else p
         except (ValueError, TypeError):
             pass
+    return None
 
-    # Fall back to nearest snapshot.
-    alert_ts = alert.get("created_at") or alert.get("timestamp")
-    if not alert_ts or not prices:
-        return None
 
-    best = None
-    best_diff = float("inf")
-    for snap in prices:
-        snap_ts = snap.get("snapshot_at", "")
-        if not snap_ts:
-            continue
-        diff = abs(_ts_ord(snap_ts) - _ts_ord(alert_ts))
-        if diff < best_diff:
-            best_diff = diff
-            best = snap
-    return best["yes_price"] if best else None
+def _price_index(prices: list[tuple]) -> tuple[list[float], list[float | None]]:
+    """Sort a market's snapshots into parallel ``(timestamps, yes_prices)`` lists."""
+    pairs = sorted(
+        ((_ts_ord(s[_P_AT]), s[_P_YES]) for s in prices if s[_P_AT]),
+        key=lambda p: p[0],
+    )
+    stamps: list[float] = []
+    yes: list[float | None] = []
+    for ts, price in pairs:
+        if stamps and stamps[-1] == ts:
+            continue  # keep the first snapshot at a given instant
+        stamps.append(ts)
+        yes.append(price)
+    return stamps, yes
+
+
+def _nearest_price(ts: float, index: tuple[list[float], list[float | None]]) -> float | None:
+    """yes_price of the snapshot closest to *ts*; earlier one wins ties."""
+    stamps, yes = index
+    if not stamps:
+        return None
+    i = bisect_left(stamps, ts)
+    if i == 0:
+        return yes[0]
+    if i == len(stamps):
+        return yes[-1]
+    return yes[i - 1] if ts - stamps[i - 1] <= stamps[i] - ts else yes[i]
 
 
+@functools.lru_cache(maxsize=1 << 16)
 def _ts_ord(value: str | int | float) -> float:
     """Convert a timestamp (ISO string *or* unix int) to seconds-since-epoch."""
     if isinstance(value, (int, float)):
         return float(value)
     try:
-        fmt = "%Y-%m-%dT%H:%M:%SZ"
-        return datetime.strptime(str(value)[:19] + "Z", fmt).timestamp()
-    except Exception:
+        # Timestamps are UTC; anything past the seconds (fraction, Z, offset) is dropped.
+        return datetime.fromisoformat(str(value)[:19]).replace(tzinfo=timezone.utc).timestamp()
+    except ValueError:
         return 0.0
 
 
@@ -518,11 +781,33 @@ def _compute_whale_stats(alerts: list[dict], resolution: str) -> dict[str, Any]:
         }
 
     n = len(alerts)
-    correct = [a for a in alerts if a.get("correct") is True]
-    incorrect = [a for a in alerts if a.get("correct") is False]
+    # One pass over the alerts instead of one per aggregate.
+    correct = incorrect = yes_count = 0
+    values: list[float] = []
+    entries: list[float] = []
+    win_rates: list[float] = []  # from whale profile, not computed
+    profits: list[float] = []
+    wallets: Counter[str] = Counter()
+    for a in alerts:
+        flag = a.get("correct")
+        if flag is True:
+            correct += 1
+        elif flag is False:
+            incorrect += 1
+        if (a.get("side") or "").upper() == "YES":
+            yes_count += 1
+        if (v := a.get("value")) is not None:
+            values.append(v)
+        if (v := a.get("entry_price")) is not None:
+            entries.append(v)
+        if (v := a.get("win_rate")) is not None:
+            win_rates.append(v)
+        if (v := a.get("profit_per_unit")) is not None:
+            profits.append(v)
+        if w := a.get("wallet") or a.get("wallet_address") or a.get("address"):
+            wallets[w] += 1
 
     # Net direction.
-    yes_count = sum(1 for a in alerts if (a.get("side") or "").upper() == "YES")
     no_count = n - yes_count
     if yes_count > no_count:
         net_dir = "YES"
@@ -536,35 +821,23 @@ def _compute_whale_stats(alerts: list[dict], resolution: str) -> dict[str, Any]:
     consensus_strength = max(yes_count, no_count) / n if n else None
 
     # Value aggregates.
-    values = [a["value"] for a in alerts if a.get("value") is not None]
     total_value = sum(values) if values else None
     avg_value = _safe_mean(values)
     max_value = max(values) if values else None
 
-    # Entry price.
-    entries = [a["entry_price"] for a in alerts if a.get("entry_price") is not None]
     avg_entry = _safe_mean(entries)
-
-    # Win rate (from whale profile, not computed).
-    win_rates = [a["win_rate"] for a in alerts if a.get("win_rate") is not None]
     avg_wr = _safe_mean(win_rates)
-
-    # Profit.
-    profits = [a["profit_per_unit"] for a in alerts if a.get("profit_per_unit") is not None]
     avg_profit = _safe_mean(profits)
 
-    # Unique wallets / repeat actors.
-    wallets = [a.get("wallet") or a.get("wallet_address") or a.get("address")
-               for a in alerts]
-    wallets = [w for w in wallets if w]
-    unique = set(wallets)
-    repeat = sum(1 for w in unique if wallets.count(w) > 1)
+    # Unique wallets / repeat actors, counted during the pass above.
+    unique = len(wallets)
+    repeat = sum(1 for c in wallets.values() if c > 1)
 
     return {
         "count": n,
-        "correct_count": len(correct),
-        "incorrect_count": len(incorrect),
-        "accuracy": len(correct) / n if n else None,
+        "correct_count": correct,
+        "incorrect_count": incorrect,
+        "accuracy": correct / n if n else None,
         "net_direction": net_dir,
         "consensus_correct": consensus_correct,
         "consensus_strength": consensus_strength,
@@ -574,7 +847,7 @@ def _compute_whale_stats(alerts: list[dict], resolution: str) -> dict[str, Any]:
         "avg_entry_price": avg_entry,
         "avg_win_rate": avg_wr,
         "avg_profit_per_unit": avg_profit,
-        "unique_wallets": len(unique),
+        "unique_wallets": unique,
         "repeat_actors": repeat,
     }
 
@@ -584,46 +857,61 @@ def _compute_whale_stats(alerts: list[dict], resolution: str) -> dict[str, Any]:
 # ------------------------------------------------------------------
 
 def _compute_price_features(prices: list[dict]) -> dict[str, Any]:
-    """Compute summary statistics over the price snapshot series."""
+    """Compute summary statistics over a price series given as dicts."""
+    return _price_features(
+        [p.get("yes_price") for p in prices],
+        [p.get("volume") for p in prices],
+        [p.get("spread") for p in prices],
+    )
+
+
+def _snapshot_features(prices: list[tuple]) -> dict[str, Any]:
+    """Compute summary statistics over ``_PRICE_COLS`` snapshot tuples."""
+    return _price_features(
+        [p[_P_YES] for p in prices],
+        [p[_P_VOLUME] for p in prices],
+        [p[_P_SPREAD] for p in prices],
+    )
+
+
+def _price_features(yes: list, volumes: list, spreads: list) -> dict[str, Any]:
+    """Summary statistics over parallel yes_price / volume / spread columns."""
     empty = {
         "mean": None, "std": None, "min": None, "max": None,
         "trend": None, "volume_mean": None, "volume_max": None,
         "spread_mean": None, "count": 0,
     }
-    if not prices:
-        return empty
-
-    yes_prices = [p["yes_price"] for p in prices if p.get("yes_price") is not None]
-    if not yes_prices:
+    yes_prices = np.fromiter((p for p in yes if p is not None), dtype=np.float64)
+    n = yes_prices.size
+    if not n:
         return empty
 
-    n = len(yes_prices)
+    mean = yes_prices.mean()
     result: dict[str, Any] = {
         "count": n,
-        "mean": statistics.mean(yes_prices),
-        "min": min(yes_prices),
-        "max": max(yes_prices),
-        "std": statistics.stdev(yes_prices) if n >= 2 else 0.0,
+        "mean": float(mean),
+        "min": float(yes_prices.min()),
+        "max": float(yes_prices.max()),
+        "std": float(yes_prices.std(ddof=1)) if n >= 2 else 0.0,
     }
 
     # Linear trend (OLS slope over index 0..n-1).
     if n >= 2:
-        x_mean = (n - 1) / 2.0
-        y_mean = result["mean"]
-        num = sum((i - x_mean) * (y - y_mean) for i, y in enumerate(yes_prices))
-        den = sum((i - x_mean) ** 2 for i in range(n))
-        result["trend"] = num / den if den else 0.0
+        x = np.arange(n, dtype=np.float64)
+        x -= x.mean()
+        den = x @ x
+        result["trend"] = float(x @ (yes_prices - mean) / den) if den else 0.0
     else:
         result["trend"] = 0.0
 
     # Volume stats.
-    volumes = [p["volume"] for p in prices if p.get("volume") is not None]
-    result["volume_mean"] = _safe_mean(volumes)
-    result["volume_max"] = max(volumes) if volumes else None
+    vol = np.fromiter((v for v in volumes if v is not None), dtype=np.float64)
+    result["volume_mean"] = float(vol.mean()) if vol.size else None
+    result["volume_max"] = float(vol.max()) if vol.size else None
 
     # Spread stats.
-    spreads = [p["spread"] for p in prices if p.get("spread") is not None]
-    result["spread_mean"] = _safe_mean(spreads)
+    spr = np.fromiter((s for s in spreads if s is not None), dtype=np.float64)
+    result["spread_mean"] = float(spr.mean()) if spr.size else None
 
     return result
 
@@ -659,75 +947,92 @@ def _normalize_wwatcher_alert(raw: dict) -> dict:
     return a
 
 
-def _load_wwatcher_alerts(
-    wwatcher_db_path: str, markets: list[dict]
+async def _load_wwatcher_alerts(
+    db, wwatcher_db_path: str, markets: list[dict]
 ) -> dict[str, list[dict]]:
-    """Load whale alerts from wwatcher DB and match to markets."""
+    """Load whale alerts from wwatcher DB and match to markets.
+
+    The wwatcher file is attached to *db* so exact ``market_id`` matches are
+    selected by SQLite; only alerts without a market id are pulled for the
+    fuzzy title fallback.
+    """
     if not os.path.exists(wwatcher_db_path):
         log.debug("wwatcher DB not found at %s, skipping join", wwatcher_db_path)
         return {}
 
     result: dict[str, list[dict]] = {}
+    mids = list(dict.fromkeys(m["market_id"] for m in markets))
     try:
-        conn = sqlite3.connect(wwatcher_db_path)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.execute("SELECT * FROM alerts")
-        alerts = [_normalize_wwatcher_alert(dict(r)) for r in cursor.fetchall()]
-        conn.close()
+        await db.execute("ATTACH DATABASE ? AS wwatcher", [wwatcher_db_path])
+    except Exception:
+        log.warning("Failed to attach wwatcher DB", exc_info=True)
+        return {}
+    try:
+        # Phase 1: exact match on market_id.
+        for i in range(0, len(mids), _IN_CHUNK):
+            chunk = mids[i:i + _IN_CHUNK]
+            placeholders = ", ".join(["?"] * len(chunk))
+            rows = await db.execute_fetchall(
+                f"SELECT * FROM wwatcher.alerts WHERE market_id IN ({placeholders}) "
+                "ORDER BY rowid",
+                chunk,
+            )
+            for r in rows:
+                a = _normalize_wwatcher_alert(dict(r))
+                result.setdefault(a["market_id"], []).append(a)
+        rows = await db.execute_fetchall(
+            "SELECT * FROM wwatcher.alerts WHERE market_id IS NULL OR market_id = '' "
+            "ORDER BY rowid"
+        )
+        unmatched = [_normalize_wwatcher_alert(dict(r)) for r in rows]
     except Exception:
         log.warning("Failed to read wwatcher DB", exc_info=True)
         return {}
-
-    if not alerts:
-        return result
-
-    # Build lookup by market_id for exact matching.
-    alert_by_mid: dict[str, list[dict]] = {}
-    unmatched: list[dict] = []
-    for a in alerts:
-        mid = a.get("market_id", "")
-        if mid:
-            alert_by_mid.setdefault(mid, []).append(a)
-        else:
-            unmatched.append(a)
-
-    # Phase 1: exact match on market_id.
-    for mkt in markets:
-        mid = mkt["market_id"]
-        if mid in alert_by_mid:
-            result[mid] = alert_by_mid[mid]
+    finally:
+        await db.execute("DETACH DATABASE wwatcher")
 
     # Phase 2: fuzzy match on title for unmatched alerts.
     if unmatched:
         try:
-            from thefuzz import fuzz
+            from rapidfuzz import fuzz, process
 
+            # Titles are normalised once here, so the scorer runs without a processor.
             title_to_mid = {
-                _normalise_title(m.get("title", "")): m["market_id"]
+                norm: m["market_id"]
                 for m in markets
-                if m.get("title")
+                if (norm := _normalise_title(m.get("title") or ""))
             }
+            titles = list(title_to_mid)
+            title_mids = list(title_to_mid.values())
             for a in unmatched:
-                alert_title = _normalise_title(a.get("market_title", ""))
+                alert_title = _normalise_title(a.get("market_title") or "")
                 if not alert_title:
                     continue
-                best_score = 0
-                best_mid = None
-                for t, mid in title_to_mid.items():
-                    score = fuzz.token_sort_ratio(alert_title, t)
-                    if score > best_score:
-                        best_score = score
-                        best_mid = mid
-                if best_score >= 80 and best_mid:
-                    result.setdefault(best_mid, []).append(a)
+                # 79.5 keeps the old behaviour of accepting scores that round to 80.
+                match = process.extractOne(
+                    alert_title,
+                    titles,
+                    scorer=fuzz.token_sort_ratio,
+                    processor=None,
+                    score_cutoff=79.5,
+                )
+                if match is not None:
+                    result.setdefault(title_mids[match[2]], []).append(a)
         except ImportError:
-            log.debug("thefuzz not available, skipping fuzzy matching")
+            log.debug("rapidfuzz not available, skipping fuzzy matching")
 
     return result
 
 
+_TITLE_NOISE = re.compile(r"[\W_]")
+
+
 def _normalise_title(title: str) -> str:
-    return title.strip().lower()
+    """Lowercase *title* and turn each non-alphanumeric character into a space.
+
+    Matches rapidfuzz's ``default_process``, so Unicode letters and digits survive.
+    """
+    return _TITLE_NOISE.sub(" ", title.lower()).strip()
 
 
 def _slug(text: str) -> str:
@@ -750,9 +1055,7 @@ def _safe_sub(a: float | None, b: float | None) -> float | None:
     return a - b
 
 
-def _days_to_resolution(mkt: dict) -> float | None:
-    end = mkt.get("end_date")
-    resolved = mkt.get("resolved_at")
+def _days_to_resolution(end: str | None, resolved: str | None) -> float | None:
     if not end or not resolved:
         return None
     try:
@@ -6,6 +6,7 @@ import logging
 from typing import Any
 
 import httpx
+import orjson
 
 log = logging.getLogger(__name__)
 
@@ -34,7 +35,7 @@ class NewsFetcher:
                 },
             )
             resp.raise_for_status()
-            data = resp.json()
+            data = orjson.loads(resp.content)
         except Exception:
             log.warning("News search failed for query=%s", query, exc_info=True)
             return []
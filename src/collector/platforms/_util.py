@@ -0,0 +1,11 @@
+"""Small helpers shared by the platform clients."""
+
+from __future__ import annotations
+
+import sys
+from typing import Any
+
+
+def intern_str(val: Any) -> Any:
+    """Share one copy of a string value that repeats across thousands of rows."""
+    return sys.intern(val) if isinstance(val, str) else val
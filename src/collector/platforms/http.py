@@ -0,0 +1,80 @@
+"""Shared httpx client construction and retry policy for the platform APIs."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import random
+from collections.abc import Awaitable, Callable
+
+import httpx
+
+try:
+    import h2  # noqa: F401 — enables httpx's HTTP/2 transport
+except ImportError:  # pragma: no cover - optional (httpx[http2] extra)
+    _HTTP2 = False
+else:
+    _HTTP2 = True
+
+log = logging.getLogger(__name__)
+
+_LIMITS = httpx.Limits(
+    max_connections=64,
+    max_keepalive_connections=32,
+    keepalive_expiry=75,
+)
+
+_RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+_MAX_ATTEMPTS = 4
+_BACKOFF_BASE = 1.0  # seconds; doubled per attempt, plus jitter
+_BACKOFF_MAX = 30.0
+
+
+def new_client() -> httpx.AsyncClient:
+    """An AsyncClient with keep-alive pooling, and HTTP/2 when ``h2`` is installed.
+
+    Response compression is left to httpx, which advertises every encoding it
+    can decode (gzip/deflate, plus br/zstd when those extras are present).
+    """
+    return httpx.AsyncClient(timeout=30, http2=_HTTP2, limits=_LIMITS)
+
+
+async def send_with_retry(
+    send: Callable[[], Awaitable[httpx.Response]], url: str | httpx.URL,
+) -> httpx.Response:
+    """Await ``send()`` (a request to *url*), retrying transport errors and 429/5xx responses.
+
+    Waits honour a numeric ``Retry-After`` header, otherwise back off
+    exponentially with jitter.  After the last attempt the error is raised,
+    or the failing response returned, for the caller to handle as before.
+    """
+    for attempt in range(1, _MAX_ATTEMPTS + 1):
+        try:
+            resp = await send()
+        except httpx.TransportError as exc:
+            if attempt == _MAX_ATTEMPTS:
+                raise
+            delay = _backoff(attempt)
+            reason = type(exc).__name__
+        else:
+            if resp.status_code not in _RETRY_STATUSES or attempt == _MAX_ATTEMPTS:
+                return resp
+            delay = _retry_after(resp)
+            if delay is None:
+                delay = _backoff(attempt)
+            reason = f"HTTP {resp.status_code}"
+        log.info("%s from %s, retrying in %.1fs (attempt %d/%d)",
+                 reason, url, delay, attempt, _MAX_ATTEMPTS)
+        await asyncio.sleep(delay)
+    raise AssertionError("unreachable")  # pragma: no cover
+
+
+def _backoff(attempt: int) -> float:
+    return min(_BACKOFF_MAX, _BACKOFF_BASE * 2 ** (attempt - 1)) + random.uniform(0, _BACKOFF_BASE)
+
+
+def _retry_after(resp: httpx.Response) -> float | None:
+    try:
+        return min(_BACKOFF_MAX, max(0.0, float(resp.headers["retry-after"])))
+    except (KeyError, ValueError):
+        return None
@@ -12,23 +12,64 @@ from __future__ import annotations
 
 import asyncio
 import logging
+import time
 from typing import Any
 
 import httpx
+import numpy as np
+import orjson
+
+from collector.platforms._util import intern_str
+from collector.platforms.http import new_client, send_with_retry
+from collector.platforms.ratelimit import RateLimiter
 
 log = logging.getLogger(__name__)
 
 _PAGE_LIMIT = 200  # Kalshi supports up to 1000, but be conservative
-_RATE_DELAY = 0.5  # ~2 req/sec to be safe
+_RATE_LIMIT = 2  # requests/sec to be safe
+_MAX_IN_FLIGHT = 8  # concurrent requests per client
+_CACHE_TTL = 60  # seconds a market listing is reused across phases
+
+_STATUS_MAP = {"open": "active", "closed": "closed", "settled": "resolved"}
+_YES_NO = ("Yes", "No")
 
 
 class KalshiClient:
-    def __init__(self, base_url: str) -> None:
+    def __init__(self, base_url: str, *, http: httpx.AsyncClient | None = None) -> None:
         self.base_url = base_url.rstrip("/")
-        self._http = httpx.AsyncClient(timeout=30)
+        # Parsed once; the listing endpoint is hit on every page.
+        self._markets_url = httpx.URL(f"{self.base_url}/markets")
+        # A shared client (owned by the caller) lets phases reuse one pool.
+        self._owns_http = http is None
+        self._http = http or new_client()
+        self._limiter = RateLimiter(_RATE_LIMIT)
+        self._sem = asyncio.Semaphore(_MAX_IN_FLIGHT)
+        # status -> (monotonic fetch time, raw markets); see _fetch_all_markets_cached.
+        self._cache: dict[str | None, tuple[float, list[dict]]] = {}
+        # Tickers from the last discover_markets, for fetch_prices() without arguments.
+        self._tracked: frozenset[str] = frozenset()
+        # Fetch time of the listing whose prices were last emitted as snapshots.
+        self._snapshotted_at: float | None = None
+
+    @property
+    def needs_active_markets(self) -> bool:
+        """Whether fetch_prices() needs the caller's active markets.
+
+        False once discover_markets() has recorded the open tickers.
+        """
+        return not self._tracked
 
     async def close(self) -> None:
-        await self._http.aclose()
+        if self._owns_http:
+            await self._http.aclose()
+
+    async def _get(self, url: str | httpx.URL, **kwargs: Any) -> httpx.Response:
+        """GET under the client's rate limit and in-flight cap, retrying transient failures."""
+        return await send_with_retry(lambda: self._get_once(url, **kwargs), url)
+
+    async def _get_once(self, url: str | httpx.URL, **kwargs: Any) -> httpx.Response:
+        async with self._sem, self._limiter:
+            return await self._http.get(url, **kwargs)
 
     # ------------------------------------------------------------------
     # DISCOVER
@@ -37,36 +78,38 @@ class KalshiClient:
     async def discover_markets(self) -> tuple[list[dict[str, Any]], list[dict[str, Any]]]:
         """Return (market_dicts, snapshot_dicts) for all open markets.
 
-        Kalshi includes prices inline, so we capture snapshots during discover.
+        Kalshi includes prices inline, so we capture snapshots during discover
+        — unless a SNAPSHOT run already emitted them from the same listing.
         """
-        raw = await self._fetch_all_markets(status="open")
-        markets = []
-        snapshots = []
-        for m in raw:
-            norm = self._normalise(m)
-            markets.append(norm)
-            # Build snapshot from normalised prices.
-            yes_bid = _cents_to_frac(m.get("yes_bid"))
-            yes_ask = _cents_to_frac(m.get("yes_ask"))
-            if yes_bid is not None and yes_ask is not None:
-                yes_price = (yes_bid + yes_ask) / 2
-            elif yes_bid is not None:
-                yes_price = yes_bid
-            else:
-                yes_price = yes_ask
-            if yes_price is not None:
-                no_price = 1.0 - yes_price
-                snapshots.append(dict(
-                    market_id=norm["market_id"],
-                    platform="kalshi",
-                    yes_price=yes_price,
-                    no_price=no_price,
-                    volume=_float(m.get("volume")),
-                    liquidity=_float(m.get("open_interest")),
-                    spread=abs(yes_price - no_price) if no_price is not None else None,
-                ))
+        fetched_at, raw = await self._fetch_all_markets_cached(status="open")
+        markets = [self._normalise(m) for m in raw]
+        self._tracked = frozenset(m["market_id"] for m in markets)
+        if fetched_at == self._snapshotted_at:
+            return markets, []
+        self._snapshotted_at = fetched_at
+        snapshots = [
+            _snapshot(m, prices)
+            for m, prices in zip(raw, _price_columns(raw))
+            if prices[0] is not None
+        ]
         return markets, snapshots
 
+    async def _fetch_all_markets_cached(
+        self, status: str | None = None, *, ttl: float = _CACHE_TTL,
+    ) -> tuple[float, list[dict]]:
+        """``_fetch_all_markets`` reusing a listing fetched less than *ttl* seconds ago.
+
+        DISCOVER and SNAPSHOT fire together and both want every open market,
+        so the second caller gets the first one's pages instead of re-walking them.
+        Returns ``(fetched_at, raw)`` with *fetched_at* on the monotonic clock.
+        """
+        cached = self._cache.get(status)
+        if cached is not None and time.monotonic() - cached[0] < ttl:
+            return cached
+        raw = await self._fetch_all_markets(status)
+        self._cache[status] = cached = (time.monotonic(), raw)
+        return cached
+
     async def _fetch_all_markets(
         self, status: str | None = None, *, max_pages: int = 50,
     ) -> list[dict]:
@@ -79,11 +122,10 @@ class KalshiClient:
                 params["status"] = status
             if cursor:
                 params["cursor"] = cursor
-            await asyncio.sleep(_RATE_DELAY)
-            resp = await self._http.get(f"{self.base_url}/markets", params=params)
+            resp = await self._get(self._markets_url, params=params)
             resp.raise_for_status()
-            data = resp.json()
-            batch = data.get("markets", [])
+            data = orjson.loads(resp.content)
+            batch = data.get("markets") or []
             all_markets.extend(batch)
             cursor = data.get("cursor")
             pages += 1
@@ -96,75 +138,48 @@ class KalshiClient:
 
     def _normalise(self, m: dict) -> dict[str, Any]:
         """Map Kalshi market JSON → our DB columns."""
-        # Kalshi prices are in cents (0–100).  Normalise to 0.0–1.0.
-        yes_bid = _cents_to_frac(m.get("yes_bid"))
-        yes_ask = _cents_to_frac(m.get("yes_ask"))
-        no_bid = _cents_to_frac(m.get("no_bid"))
-
-        # Use midpoint of yes bid/ask as the canonical yes_price.
-        if yes_bid is not None and yes_ask is not None:
-            yes_price = (yes_bid + yes_ask) / 2
-        elif yes_bid is not None:
-            yes_price = yes_bid
-        else:
-            yes_price = yes_ask
-        no_price = 1.0 - yes_price if yes_price is not None else None
-
-        status_map = {"open": "active", "closed": "closed", "settled": "resolved"}
-
+        get = m.get
+        ticker = get("ticker", "")
         return dict(
             platform="kalshi",
-            market_id=m.get("ticker", ""),
-            slug=m.get("ticker", ""),
-            title=m.get("title", ""),
-            description=m.get("subtitle", ""),
-            category=m.get("category", ""),
-            outcomes=["Yes", "No"],
-            volume=_float(m.get("volume")),
-            liquidity=_float(m.get("open_interest")),
-            end_date=m.get("close_time") or m.get("expiration_time"),
-            status=status_map.get(m.get("status", ""), "active"),
+            market_id=ticker,
+            slug=ticker,
+            title=get("title", ""),
+            description=get("subtitle", ""),
+            category=intern_str(get("category", "")),
+            outcomes=_YES_NO,
+            volume=_float(get("volume")),
+            liquidity=_float(get("open_interest")),
+            end_date=get("close_time") or get("expiration_time"),
+            status=_STATUS_MAP.get(get("status", ""), "active"),
         )
 
     # ------------------------------------------------------------------
-    # SNAPSHOT — prices are inline, just re-fetch the list
+    # SNAPSHOT — prices are inline, reuse the open-market listing
     # ------------------------------------------------------------------
 
-    async def fetch_prices(self, markets: list[dict]) -> list[dict]:
+    async def fetch_prices(self, markets: list[dict] | None = None) -> list[dict]:
         """Fetch current prices for tracked markets.
 
-        We batch-fetch by re-querying open markets since Kalshi includes
-        prices in the market response.  For a smaller set we could query
-        individual tickers; the bulk approach is simpler.
+        Kalshi includes prices in the market response, so this filters the
+        open-market listing — shared with a DISCOVER run in the last
+        ``_CACHE_TTL`` seconds, otherwise re-queried in bulk.  Without
+        *markets*, the tickers from the last discover are used.
+
+        A listing whose prices were already emitted (by discover or an
+        earlier call) yields no rows, so a shared listing is never stored twice.
         """
-        raw = await self._fetch_all_markets(status="open")
-        tracked_ids = {m["market_id"] for m in markets}
-        snapshots: list[dict] = []
-        for m in raw:
-            ticker = m.get("ticker", "")
-            if ticker not in tracked_ids:
-                continue
-
-            yes_bid = _cents_to_frac(m.get("yes_bid"))
-            yes_ask = _cents_to_frac(m.get("yes_ask"))
-            if yes_bid is not None and yes_ask is not None:
-                yes_price = (yes_bid + yes_ask) / 2
-            elif yes_bid is not None:
-                yes_price = yes_bid
-            else:
-                yes_price = yes_ask
-            no_price = 1.0 - yes_price if yes_price is not None else None
-            spread = abs(yes_price - no_price) if yes_price is not None and no_price is not None else None
-
-            snapshots.append(dict(
-                market_id=ticker,
-                platform="kalshi",
-                yes_price=yes_price,
-                no_price=no_price,
-                volume=_float(m.get("volume")),
-                liquidity=_float(m.get("open_interest")),
-                spread=spread,
-            ))
+        fetched_at, raw = await self._fetch_all_markets_cached(status="open")
+        if fetched_at == self._snapshotted_at:
+            log.info("Kalshi: prices from this listing already captured, skipping")
+            return []
+        self._snapshotted_at = fetched_at
+        if markets is None:
+            tracked_ids = self._tracked
+        else:
+            tracked_ids = frozenset(m["market_id"] for m in markets)
+        tracked = [m for m in raw if m.get("ticker", "") in tracked_ids]
+        snapshots = [_snapshot(m, prices) for m, prices in zip(tracked, _price_columns(tracked))]
         log.info("Kalshi: captured %d price snapshots", len(snapshots))
         return snapshots
 
@@ -179,12 +194,12 @@ class KalshiClient:
             "YES", "NO", or None if not settled.
         """
         try:
-            await asyncio.sleep(_RATE_DELAY)
-            resp = await self._http.get(f"{self.base_url}/markets/{market_id}")
+            resp = await self._get(f"{self.base_url}/markets/{market_id}")
             if resp.status_code == 404:
                 return None
             resp.raise_for_status()
-            data = resp.json().get("market", resp.json())
+            body = orjson.loads(resp.content)
+            data = body.get("market", body)
         except Exception:
             log.warning("Kalshi: resolution check failed for %s", market_id, exc_info=True)
             return None
@@ -218,15 +233,52 @@ class KalshiClient:
         return results
 
 
-def _cents_to_frac(val: Any) -> float | None:
-    """Convert Kalshi price in cents (0-100) to fraction (0.0-1.0)."""
-    if val is None:
-        return None
+def _price_columns(raw: list[dict]) -> list[tuple[float | None, float | None, float | None]]:
+    """``(yes_price, no_price, spread)`` for each raw market, computed column-wise.
+
+    The canonical yes price is the yes bid/ask midpoint, or whichever side is
+    quoted; ``None`` when neither is.
+    """
+    quotes = [(m.get("yes_bid"), m.get("yes_ask")) for m in raw]
     try:
-        v = float(val)
-        return v / 100.0 if v > 1 else v
+        arr = np.array(quotes, dtype=np.float64).reshape(-1, 2)  # None -> NaN
     except (ValueError, TypeError):
-        return None
+        arr = np.array(
+            [[_nan_float(v) for v in q] for q in quotes], dtype=np.float64,
+        ).reshape(-1, 2)
+    # Cents (0-100) to fractions, leaving values already in 0-1 alone.
+    arr = np.where(arr > 1, arr / 100.0, arr)
+    bid, ask = arr[:, 0], arr[:, 1]
+    # NaN propagates through the midpoint, so one-sided books fall back to
+    # the quoted side without a per-row branch.
+    mid = 0.5 * (bid + ask)
+    yes = np.where(np.isnan(mid), np.where(np.isnan(bid), ask, bid), mid)
+    no = 1.0 - yes
+    spread = np.abs(yes - no)
+    return [
+        (None, None, None) if y != y else (y, n, sp)
+        for y, n, sp in zip(yes.tolist(), no.tolist(), spread.tolist())
+    ]
+
+
+def _snapshot(
+    m: dict, prices: tuple[float | None, float | None, float | None],
+) -> dict[str, Any]:
+    yes_price, no_price, spread = prices
+    return dict(
+        market_id=m.get("ticker", ""),
+        platform="kalshi",
+        yes_price=yes_price,
+        no_price=no_price,
+        volume=_float(m.get("volume")),
+        liquidity=_float(m.get("open_interest")),
+        spread=spread,
+    )
+
+
+def _nan_float(val: Any) -> float:
+    f = _float(val)
+    return np.nan if f is None else f
 
 
 def _float(val: Any) -> float | None:
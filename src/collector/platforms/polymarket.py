@@ -10,26 +10,106 @@ Resolution logic:
 from __future__ import annotations
 
 import asyncio
-import json
+import functools
 import logging
+from collections.abc import AsyncIterator
 from typing import Any
 
 import httpx
+import orjson
+
+from collector.platforms._util import intern_str
+from collector.platforms.http import new_client, send_with_retry
+from collector.platforms.ratelimit import RateLimiter
 
 log = logging.getLogger(__name__)
 
 _PAGE_LIMIT = 100  # Gamma API max per page
-_RATE_DELAY = 0.5  # 2 req/sec
+_RATE_LIMIT = 2  # requests/sec
+_MAX_IN_FLIGHT = 8  # concurrent requests per client
+_PRICE_BATCH = 50  # condition ids per /markets price lookup
 
 
 class PolymarketClient:
-    def __init__(self, gamma_url: str, clob_url: str) -> None:
+    def __init__(
+        self, gamma_url: str, clob_url: str, *, http: httpx.AsyncClient | None = None,
+    ) -> None:
         self.gamma_url = gamma_url.rstrip("/")
         self.clob_url = clob_url.rstrip("/")
-        self._http = httpx.AsyncClient(timeout=30)
+        # Parsed once; the listing endpoint is hit on every page and price batch.
+        self._markets_url = httpx.URL(f"{self.gamma_url}/markets")
+        # A shared client (owned by the caller) lets phases reuse one pool.
+        self._owns_http = http is None
+        self._http = http or new_client()
+        self._limiter = RateLimiter(_RATE_LIMIT)
+        self._sem = asyncio.Semaphore(_MAX_IN_FLIGHT)
+
+    @property
+    def needs_active_markets(self) -> bool:
+        """Whether fetch_prices() needs the caller's active markets (always)."""
+        return True
 
     async def close(self) -> None:
-        await self._http.aclose()
+        if self._owns_http:
+            await self._http.aclose()
+
+    async def _get(self, url: str | httpx.URL, **kwargs: Any) -> httpx.Response:
+        """GET under the client's rate limit and in-flight cap, retrying transient failures."""
+        return await send_with_retry(lambda: self._get_once(url, **kwargs), url)
+
+    async def _get_once(self, url: str | httpx.URL, **kwargs: Any) -> httpx.Response:
+        async with self._sem, self._limiter:
+            return await self._http.get(url, **kwargs)
+
+    async def _iter_pages(
+        self, params: dict[str, Any], *, max_markets: int, label: str,
+    ) -> AsyncIterator[list[dict]]:
+        """Keyset-paginate ``/markets`` with *params* in ascending id order.
+
+        Each page asks for ids above the last one returned, so pages cannot
+        overlap and the server never re-scans earlier rows the way a deep
+        ``offset`` does.  Pages are yielded raw so callers can normalise them
+        and let the Gamma dicts go before the next page arrives.
+
+        When the first response carries ``X-Total-Count`` the walk stops as
+        soon as that many markets are in, skipping the trailing empty page
+        a full last page would otherwise cost.
+
+        If the server ignores ``id_gt`` (a page comes back starting at or
+        below the cursor) the rest of the walk falls back to ``offset``
+        paging rather than stopping short.
+        """
+        fetched = 0
+        last_id: int | None = None
+        total: int | None = None
+        use_offset = False
+        while fetched < max_markets:
+            page: dict[str, Any] = {
+                **params, "limit": _PAGE_LIMIT, "order": "id", "ascending": "true",
+            }
+            if use_offset:
+                page["offset"] = fetched
+            elif last_id is not None:
+                page["id_gt"] = last_id
+            resp = await self._get(self._markets_url, params=page)
+            resp.raise_for_status()
+            batch = orjson.loads(resp.content)
+            if last_id is None:
+                total = _total_count(resp)
+            elif not use_offset and batch and _gamma_id(batch[0]) <= last_id:
+                log.warning(
+                    "Polymarket: %sserver ignored id_gt=%d, falling back to offset paging",
+                    label, last_id,
+                )
+                use_offset = True
+                continue
+            if not batch:
+                break
+            fetched += len(batch)
+            last_id = _gamma_id(batch[-1])
+            yield batch
+            if len(batch) < _PAGE_LIMIT or (total is not None and fetched >= total):
+                break
 
     # ------------------------------------------------------------------
     # DISCOVER — paginated fetch of all active markets
@@ -41,24 +121,26 @@ class PolymarketClient:
         Prices are captured from the discovery response so we don't need
         individual per-market API calls for the initial snapshot.
         """
-        raw_markets = await self._fetch_all_markets()
         markets = []
         snapshots = []
-        for m in raw_markets:
-            markets.append(self._normalise(m))
-            snap = self._extract_snapshot(m)
-            if snap:
-                snapshots.append(snap)
+        async for batch in self._iter_pages(
+            {"active": "true", "closed": "false", "archived": "false"},
+            max_markets=5000,  # safety cap — Polymarket has ~2-3k active markets
+            label="",
+        ):
+            for m in batch:
+                markets.append(self._normalise(m))
+                snap = self._extract_snapshot(m)
+                if snap:
+                    snapshots.append(snap)
+        log.info("Polymarket: discovered %d unique active markets", len(markets))
         return markets, snapshots
 
     def _extract_snapshot(self, m: dict) -> dict[str, Any] | None:
         """Extract a price snapshot from a raw Gamma API market object."""
         outcome_prices = m.get("outcomePrices", "[]")
         if isinstance(outcome_prices, str):
-            try:
-                outcome_prices = json.loads(outcome_prices)
-            except (json.JSONDecodeError, TypeError):
-                return None
+            outcome_prices = _parse_json_array(outcome_prices)
         if not outcome_prices:
             return None
         try:
@@ -80,64 +162,24 @@ class PolymarketClient:
             spread=spread,
         )
 
-    async def _fetch_all_markets(self) -> list[dict]:
-        all_markets: list[dict] = []
-        seen_ids: set[str] = set()
-        offset = 0
-        max_offset = 5000  # safety cap — Polymarket has ~2-3k active markets
-        while offset <= max_offset:
-            params = {
-                "limit": _PAGE_LIMIT,
-                "offset": offset,
-                "active": "true",
-                "closed": "false",
-                "archived": "false",
-            }
-            await asyncio.sleep(_RATE_DELAY)
-            resp = await self._http.get(f"{self.gamma_url}/markets", params=params)
-            resp.raise_for_status()
-            batch = resp.json()
-            if not batch:
-                break
-            # Deduplicate — Gamma API can recycle results at high offsets.
-            new_count = 0
-            for m in batch:
-                cid = str(m.get("conditionId") or m.get("id", ""))
-                if cid and cid not in seen_ids:
-                    seen_ids.add(cid)
-                    all_markets.append(m)
-                    new_count += 1
-            if new_count == 0:
-                log.info("Polymarket: no new markets at offset %d, stopping", offset)
-                break
-            if len(batch) < _PAGE_LIMIT:
-                break
-            offset += _PAGE_LIMIT
-        log.info("Polymarket: discovered %d unique active markets", len(all_markets))
-        return all_markets
-
     def _normalise(self, m: dict) -> dict[str, Any]:
         """Map Gamma API market object → our DB columns."""
-        outcomes = m.get("outcomes", "[]")
+        get = m.get
+        outcomes = get("outcomes", "[]")
         if isinstance(outcomes, str):
-            try:
-                outcomes = json.loads(outcomes)
-            except (json.JSONDecodeError, TypeError):
-                outcomes = []
-
-        end_date = m.get("endDate") or m.get("endDateIso")
+            outcomes = _parse_json_array(outcomes)  # shared, immutable
 
         return dict(
             platform="polymarket",
-            market_id=str(m.get("conditionId") or m.get("id", "")),
-            slug=m.get("slug", ""),
-            title=m.get("question", ""),
-            description=(m.get("description") or "")[:2000],
-            category=m.get("groupItemTitle", ""),
+            market_id=str(get("conditionId") or get("id", "")),
+            slug=get("slug", ""),
+            title=get("question", ""),
+            description=(get("description") or "")[:2000],
+            category=intern_str(get("groupItemTitle", "")),
             outcomes=outcomes,
-            volume=_float(m.get("volume") or m.get("volumeNum")),
-            liquidity=_float(m.get("liquidity") or m.get("liquidityNum")),
-            end_date=end_date,
+            volume=_float(get("volume") or get("volumeNum")),
+            liquidity=_float(get("liquidity") or get("liquidityNum")),
+            end_date=get("endDate") or get("endDateIso"),
             status="active",
         )
 
@@ -148,50 +190,33 @@ class PolymarketClient:
     async def fetch_prices(self, markets: list[dict], *, max_markets: int = 200) -> list[dict]:
         """Return snapshot rows for the given markets (capped to max_markets)."""
         # Only refresh a subset per cycle — discover already captures initial prices.
-        subset = markets[:max_markets]
-        snapshots: list[dict] = []
-        for mkt in subset:
-            slug = mkt.get("slug", "")
-            if not slug:
-                continue
-            try:
-                await asyncio.sleep(_RATE_DELAY)
-                resp = await self._http.get(
-                    f"{self.gamma_url}/markets",
-                    params={"slug": slug, "limit": 1},
-                )
-                if resp.status_code in (404, 422):
-                    continue
-                resp.raise_for_status()
-                data_list = resp.json()
-                if not data_list:
-                    continue
-                data = data_list[0] if isinstance(data_list, list) else data_list
-            except Exception:
-                log.warning("Polymarket: price fetch failed for %s", slug, exc_info=True)
-                continue
+        ids = [mkt["market_id"] for mkt in markets[:max_markets] if mkt["market_id"]]
+        results = await asyncio.gather(*(
+            self._fetch_price_batch(ids[i:i + _PRICE_BATCH])
+            for i in range(0, len(ids), _PRICE_BATCH)
+        ))
+        snapshots = [snap for batch in results for snap in batch]
+        log.info("Polymarket: captured %d price snapshots", len(snapshots))
+        return snapshots
 
-            outcome_prices = data.get("outcomePrices", "[]")
-            if isinstance(outcome_prices, str):
-                try:
-                    outcome_prices = json.loads(outcome_prices)
-                except (json.JSONDecodeError, TypeError):
-                    outcome_prices = []
+    async def _fetch_price_batch(self, ids: list[str]) -> list[dict]:
+        """Snapshot rows for up to ``_PRICE_BATCH`` condition ids in one request."""
+        params = [("condition_ids", cid) for cid in ids]
+        params.append(("limit", len(ids)))
+        try:
+            resp = await self._get(self._markets_url, params=params)
+            resp.raise_for_status()
+            data_list = orjson.loads(resp.content)
+        except Exception:
+            log.warning("Polymarket: price fetch failed for %d markets", len(ids), exc_info=True)
+            return []
 
-            yes_price = float(outcome_prices[0]) if len(outcome_prices) > 0 else None
-            no_price = float(outcome_prices[1]) if len(outcome_prices) > 1 else None
-            spread = abs(yes_price - no_price) if yes_price is not None and no_price is not None else None
-
-            snapshots.append(dict(
-                market_id=mkt["market_id"],
-                platform="polymarket",
-                yes_price=yes_price,
-                no_price=no_price,
-                volume=_float(data.get("volume") or data.get("volumeNum")),
-                liquidity=_float(data.get("liquidity") or data.get("liquidityNum")),
-                spread=spread,
-            ))
-        log.info("Polymarket: captured %d price snapshots", len(snapshots))
+        wanted = set(ids)
+        snapshots = []
+        for m in data_list or ():
+            snap = self._extract_snapshot(m)
+            if snap is not None and snap["market_id"] in wanted:
+                snapshots.append(snap)
         return snapshots
 
     # ------------------------------------------------------------------
@@ -205,12 +230,11 @@ class PolymarketClient:
             "YES", "NO", or None if not yet resolved.
         """
         try:
-            await asyncio.sleep(_RATE_DELAY)
-            resp = await self._http.get(f"{self.gamma_url}/markets/{market_id}")
+            resp = await self._get(f"{self.gamma_url}/markets/{market_id}")
             if resp.status_code == 404:
                 return None
             resp.raise_for_status()
-            data = resp.json()
+            data = orjson.loads(resp.content)
         except Exception:
             log.warning("Polymarket: resolution check failed for %s", market_id, exc_info=True)
             return None
@@ -223,10 +247,7 @@ class PolymarketClient:
 
         outcome_prices = data.get("outcomePrices", "[]")
         if isinstance(outcome_prices, str):
-            try:
-                outcome_prices = json.loads(outcome_prices)
-            except (json.JSONDecodeError, TypeError):
-                return None
+            outcome_prices = _parse_json_array(outcome_prices)
 
         if not outcome_prices:
             return None
@@ -251,37 +272,15 @@ class PolymarketClient:
 
     async def fetch_resolved_markets(self) -> list[dict[str, Any]]:
         """Fetch historical resolved markets for backfill."""
-        all_markets: list[dict] = []
-        seen_ids: set[str] = set()
-        offset = 0
-        max_offset = 20000  # backfill can go deeper
-        while offset <= max_offset:
-            params = {
-                "limit": _PAGE_LIMIT,
-                "offset": offset,
-                "closed": "true",
-            }
-            await asyncio.sleep(_RATE_DELAY)
-            resp = await self._http.get(f"{self.gamma_url}/markets", params=params)
-            resp.raise_for_status()
-            batch = resp.json()
-            if not batch:
-                break
-            new_count = 0
-            for m in batch:
-                cid = str(m.get("conditionId") or m.get("id", ""))
-                if cid and cid not in seen_ids:
-                    seen_ids.add(cid)
-                    all_markets.append(m)
-                    new_count += 1
-            if new_count == 0:
-                log.info("Polymarket: backfill no new markets at offset %d, stopping", offset)
-                break
-            if len(batch) < _PAGE_LIMIT:
-                break
-            offset += _PAGE_LIMIT
-        log.info("Polymarket: backfill fetched %d unique closed markets", len(all_markets))
-        return [self._normalise_resolved(m) for m in all_markets]
+        results: list[dict] = []
+        async for batch in self._iter_pages(
+            {"closed": "true"},
+            max_markets=20000,  # backfill can go deeper
+            label="backfill ",
+        ):
+            results.extend(self._normalise_resolved(m) for m in batch)
+        log.info("Polymarket: backfill fetched %d unique closed markets", len(results))
+        return results
 
     def _normalise_resolved(self, m: dict) -> dict[str, Any]:
         """Normalise a resolved/closed market for backfill upsert."""
@@ -290,10 +289,7 @@ class PolymarketClient:
 
         outcome_prices = m.get("outcomePrices", "[]")
         if isinstance(outcome_prices, str):
-            try:
-                outcome_prices = json.loads(outcome_prices)
-            except (json.JSONDecodeError, TypeError):
-                outcome_prices = []
+            outcome_prices = _parse_json_array(outcome_prices)
 
         if outcome_prices:
             try:
@@ -308,6 +304,34 @@ class PolymarketClient:
         return base
 
 
+def _total_count(resp: httpx.Response) -> int | None:
+    try:
+        return int(resp.headers["x-total-count"])
+    except (KeyError, ValueError):
+        return None
+
+
+def _gamma_id(m: dict) -> int:
+    """Numeric Gamma market id, the keyset pagination cursor (``-1`` if absent)."""
+    try:
+        return int(m.get("id"))
+    except (ValueError, TypeError):
+        return -1
+
+
+@functools.lru_cache(maxsize=2048)
+def _parse_json_array(raw: str) -> tuple:
+    """Decode an embedded JSON array (``outcomes``, ``outcomePrices``); ``()`` if invalid.
+
+    Memoised because the same strings recur across markets — ``'["Yes", "No"]'``
+    nearly everywhere, and ``'["1", "0"]'``-style prices once markets resolve.
+    """
+    try:
+        return tuple(orjson.loads(raw))
+    except (orjson.JSONDecodeError, TypeError):
+        return ()
+
+
 def _float(val: Any) -> float | None:
     if val is None:
         return None
@@ -0,0 +1,41 @@
+"""Async token-bucket rate limiter shared by the platform clients."""
+
+from __future__ import annotations
+
+import asyncio
+import time
+
+
+class RateLimiter:
+    """Allow at most *rate* acquisitions per *period* seconds.
+
+    Tokens refill continuously, so up to *rate* requests may start back to
+    back before callers are spaced out.  Use as ``async with limiter:``.
+    """
+
+    def __init__(self, rate: float, period: float = 1.0) -> None:
+        self._capacity = float(rate)
+        self._interval = period / rate  # seconds per token
+        self._tokens = float(rate)
+        self._last = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        # The lock makes waiters queue FIFO instead of racing for each token.
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(
+                    self._capacity, self._tokens + (now - self._last) / self._interval,
+                )
+                self._last = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) * self._interval)
+
+    async def __aenter__(self) -> None:
+        await self.acquire()
+
+    async def __aexit__(self, *exc: object) -> None:
+        return None
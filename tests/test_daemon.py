@@ -2,11 +2,13 @@
 
 from __future__ import annotations
 
+import asyncio
+
 import httpx
 import pytest
 import respx
 
-from collector.daemon import Collector
+from collector.daemon import Collector, run_daemon
 from collector.db import get_markets_by_status, upsert_market
 
 GAMMA_URL = "https://gamma-api.polymarket.com"
@@ -67,6 +69,56 @@ async def test_discover_phase(db, cfg):
     assert platforms == {"polymarket", "kalshi"}
 
 
+@pytest.mark.asyncio
+async def test_discover_phase_runs_platforms_concurrently(db, cfg):
+    """Each platform's discover waits for the other to start — only passes if gathered."""
+    started = {"poly": asyncio.Event(), "kalshi": asyncio.Event()}
+    overlapped: list[str] = []
+
+    def _discover(me, other):
+        async def _run():
+            started[me].set()
+            await asyncio.wait_for(started[other].wait(), timeout=1)
+            overlapped.append(me)
+            return [], []
+        return _run
+
+    collector = Collector(cfg, db)
+    await collector.start()
+    collector.poly.discover_markets = _discover("poly", "kalshi")
+    collector.kalshi.discover_markets = _discover("kalshi", "poly")
+    count = await collector.run_discover()
+    await collector.stop()
+
+    assert count == 0
+    assert sorted(overlapped) == ["kalshi", "poly"]
+
+
+@pytest.mark.asyncio
+async def test_snapshot_phase_uses_kalshi_tracked_tickers(db, cfg):
+    """SNAPSHOT reads active Kalshi markets from the DB only until discover has run."""
+    cfg.polymarket.enabled = False
+    await upsert_market(db, platform="kalshi", market_id="K-1", title="K", status="active")
+    await db.commit()
+
+    calls: list[list[dict] | None] = []
+
+    async def _fetch_prices(markets=None):
+        calls.append(markets)
+        return []
+
+    collector = Collector(cfg, db)
+    await collector.start()
+    collector.kalshi.fetch_prices = _fetch_prices
+    await collector.run_snapshot()  # cold start: nothing tracked yet
+    collector.kalshi._tracked = frozenset({"K-1"})
+    await collector.run_snapshot()
+    await collector.stop()
+
+    assert [m["market_id"] for m in calls[0]] == ["K-1"]
+    assert calls[1] is None
+
+
 @pytest.mark.asyncio
 @respx.mock
 async def test_resolve_phase(db, cfg):
@@ -104,3 +156,25 @@ async def test_resolve_phase(db, cfg):
     rows = await get_markets_by_status(db, "resolved")
     assert len(rows) == 1
     assert rows[0]["resolution"] == "YES"
+
+
+@pytest.mark.asyncio
+async def test_run_daemon_schedules_phases_in_order(db, cfg, monkeypatch):
+    """First cycle runs every phase once, in declaration order."""
+    calls: list[str] = []
+
+    def _phase(name):
+        async def _run(self):
+            calls.append(name)
+            if len(calls) == 4:
+                raise asyncio.CancelledError
+            return 0
+        return _run
+
+    for name in ("discover", "snapshot", "resolve", "backfill"):
+        monkeypatch.setattr(Collector, f"run_{name}", _phase(name))
+
+    with pytest.raises(asyncio.CancelledError):
+        await run_daemon(cfg, db)
+
+    assert calls == ["discover", "snapshot", "resolve", "backfill"]
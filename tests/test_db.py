@@ -2,17 +2,24 @@
 
 from __future__ import annotations
 
+import json
+import sqlite3
+
 import pytest
 
 from collector.db import (
+    init_db,
     get_markets_by_status,
     get_unresolved_past_end,
     insert_snapshot,
     insert_snapshots_bulk,
     mark_closed,
+    mark_closed_bulk,
     mark_resolved,
+    mark_resolved_bulk,
     stats,
     upsert_market,
+    upsert_markets_bulk,
 )
 
 
@@ -29,6 +36,48 @@ async def test_schema_created(db):
     assert "_meta" in names
 
 
+@pytest.mark.asyncio
+async def test_connection_pragmas(db):
+    """init_db (and so the db fixture) runs in WAL with relaxed fsync."""
+    assert (await db.execute_fetchall("PRAGMA journal_mode"))[0][0] == "wal"
+    assert (await db.execute_fetchall("PRAGMA synchronous"))[0][0] == 1  # NORMAL
+    assert (await db.execute_fetchall("PRAGMA temp_store"))[0][0] == 2  # MEMORY
+
+
+@pytest.mark.asyncio
+async def test_migrates_v1_schema(tmp_path):
+    """A v1 database (AUTOINCREMENT ids) is rebuilt with its rows intact."""
+    path = str(tmp_path / "v1.db")
+    conn = sqlite3.connect(path)
+    conn.executescript(
+        "CREATE TABLE _meta (key TEXT PRIMARY KEY, value TEXT);"
+        "INSERT INTO _meta VALUES ('schema_version', '1');"
+        "CREATE TABLE markets (id INTEGER PRIMARY KEY AUTOINCREMENT, "
+        "platform TEXT NOT NULL, market_id TEXT NOT NULL, title TEXT, "
+        "status TEXT DEFAULT 'active', created_at TEXT NOT NULL, "
+        "updated_at TEXT NOT NULL, UNIQUE(platform, market_id));"
+        "INSERT INTO markets (platform, market_id, title, created_at, updated_at) "
+        "VALUES ('kalshi', 'K1', 'Old', '2025-01-01T00:00:00Z', '2025-01-01T00:00:00Z');"
+    )
+    conn.commit()
+    conn.close()
+
+    db = await init_db(path)
+    try:
+        rows = await get_markets_by_status(db, "active")
+        assert [r["market_id"] for r in rows] == ["K1"]
+        ddl = await db.execute_fetchall(
+            "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'markets'"
+        )
+        assert "AUTOINCREMENT" not in ddl[0]["sql"]
+        version = await db.execute_fetchall(
+            "SELECT value FROM _meta WHERE key = 'schema_version'"
+        )
+        assert version[0]["value"] != "1"
+    finally:
+        await db.close()
+
+
 @pytest.mark.asyncio
 async def test_upsert_market_insert_and_update(db):
     await upsert_market(
@@ -61,6 +110,29 @@ async def test_upsert_market_insert_and_update(db):
     assert rows[0]["volume"] == 50000.0
 
 
+@pytest.mark.asyncio
+async def test_upsert_markets_bulk(db):
+    rows = [
+        dict(platform="kalshi", market_id="K1", title="A", outcomes=["Yes", "No"], status="active"),
+        dict(platform="kalshi", market_id="K2", title="B", outcomes=["Yes", "No"], status="active"),
+        dict(platform="kalshi", market_id="K3", title="C", status="resolved", resolution="NO"),
+    ]
+    count = await upsert_markets_bulk(db, rows)
+    await db.commit()
+    assert count == 3
+
+    rows = await get_markets_by_status(db, "active")
+    assert {r["market_id"] for r in rows} == {"K1", "K2"}
+    assert json.loads(rows[0]["outcomes"]) == ["Yes", "No"]
+
+    # Re-upsert without resolution keeps the stored value.
+    await upsert_markets_bulk(db, [dict(platform="kalshi", market_id="K3", title="C2")])
+    await db.commit()
+    rows = await get_markets_by_status(db, "resolved")
+    assert rows[0]["title"] == "C2"
+    assert rows[0]["resolution"] == "NO"
+
+
 @pytest.mark.asyncio
 async def test_mark_resolved(db):
     await upsert_market(
@@ -101,26 +173,34 @@ async def test_mark_closed(db):
     assert len(rows) == 1
 
 
+@pytest.mark.asyncio
+async def test_mark_bulk(db):
+    await upsert_markets_bulk(db, [
+        dict(platform="kalshi", market_id="R1", title="A", status="active"),
+        dict(platform="kalshi", market_id="R2", title="B", status="active"),
+        dict(platform="polymarket", market_id="C1", title="C", status="active"),
+    ])
+    count = await mark_resolved_bulk(db, [("kalshi", "R1", "YES"), ("kalshi", "R2", "NO")])
+    await mark_closed_bulk(db, [("polymarket", "C1")])
+    await db.commit()
+
+    assert count == 2
+    rows = await get_markets_by_status(db, "resolved")
+    assert {r["market_id"]: r["resolution"] for r in rows} == {"R1": "YES", "R2": "NO"}
+    rows = await get_markets_by_status(db, "closed")
+    assert [r["market_id"] for r in rows] == ["C1"]
+
+
 @pytest.mark.asyncio
 async def test_unresolved_past_end(db):
-    # Market with past end_date.
-    await upsert_market(
-        db,
-        platform="polymarket",
-        market_id="old1",
-        title="Old market",
-        status="active",
-        end_date="2020-01-01T00:00:00Z",
-    )
-    # Market with future end_date.
-    await upsert_market(
-        db,
-        platform="polymarket",
-        market_id="future1",
-        title="Future market",
-        status="active",
-        end_date="2099-01-01T00:00:00Z",
-    )
+    await upsert_markets_bulk(db, [
+        # Market with past end_date.
+        dict(platform="polymarket", market_id="old1", title="Old market",
+             status="active", end_date="2020-01-01T00:00:00Z"),
+        # Market with future end_date.
+        dict(platform="polymarket", market_id="future1", title="Future market",
+             status="active", end_date="2099-01-01T00:00:00Z"),
+    ])
     await db.commit()
 
     candidates = await get_unresolved_past_end(db)
@@ -164,9 +244,11 @@ async def test_insert_snapshots_bulk(db):
 
 @pytest.mark.asyncio
 async def test_stats(db):
-    await upsert_market(db, platform="polymarket", market_id="m1", title="A", status="active")
-    await upsert_market(db, platform="polymarket", market_id="m2", title="B", status="active")
-    await upsert_market(db, platform="kalshi", market_id="m3", title="C", status="resolved")
+    await upsert_markets_bulk(db, [
+        dict(platform="polymarket", market_id="m1", title="A", status="active"),
+        dict(platform="polymarket", market_id="m2", title="B", status="active"),
+        dict(platform="kalshi", market_id="m3", title="C", status="resolved"),
+    ])
     await insert_snapshot(db, market_id="m1", platform="polymarket", yes_price=0.5, no_price=0.5)
     await db.commit()
 
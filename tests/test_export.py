@@ -2,15 +2,24 @@
 
 from __future__ import annotations
 
+import sqlite3
+
+import pyarrow.parquet as pq
 import pytest
 
+from collector.db import insert_snapshot, mark_resolved, upsert_market
 from collector.export import (
     _compute_price_features,
     _compute_whale_stats,
     _enrich_alerts,
+    _headlines_text,
+    _load_wwatcher_alerts,
+    _normalise_title,
     _normalize_wwatcher_alert,
     _resolution_to_int,
     _ts_ord,
+    export_all,
+    export_parquet,
 )
 
 
@@ -18,6 +27,11 @@ from collector.export import (
 # Alert enrichment
 # ------------------------------------------------------------------
 
+def _snap(yes_price: float, snapshot_at: str) -> tuple:
+    """Price snapshot tuple in ``_PRICE_COLS`` order."""
+    return (yes_price, None, None, None, None, snapshot_at)
+
+
 class TestEnrichAlerts:
     def test_correct_yes(self):
         alerts = [{"side": "YES", "price": 0.60}]
@@ -54,14 +68,28 @@ class TestEnrichAlerts:
     def test_entry_price_from_snapshot(self):
         alerts = [{"side": "YES", "timestamp": "2026-01-15T12:00:00Z"}]
         prices = [
-            {"yes_price": 0.50, "snapshot_at": "2026-01-15T11:00:00Z"},
-            {"yes_price": 0.55, "snapshot_at": "2026-01-15T12:05:00Z"},
-            {"yes_price": 0.60, "snapshot_at": "2026-01-15T13:00:00Z"},
+            _snap(0.50, "2026-01-15T11:00:00Z"),
+            _snap(0.55, "2026-01-15T12:05:00Z"),
+            _snap(0.60, "2026-01-15T13:00:00Z"),
         ]
         result = _enrich_alerts(alerts, "YES", prices)
         # Nearest snapshot is 12:05 → entry_price = 0.55
         assert result[0]["entry_price"] == pytest.approx(0.55)
 
+    def test_entry_price_outside_and_between_snapshots(self):
+        alerts = [
+            {"side": "YES", "timestamp": "2026-01-15T09:00:00Z"},
+            {"side": "YES", "timestamp": "2026-01-15T12:00:00Z"},
+            {"side": "YES", "timestamp": "2026-01-15T15:00:00Z"},
+        ]
+        prices = [
+            _snap(0.50, "2026-01-15T11:00:00Z"),
+            _snap(0.60, "2026-01-15T13:00:00Z"),
+        ]
+        result = _enrich_alerts(alerts, "YES", prices)
+        # Before the first / after the last snapshot clamp; equidistant picks the earlier.
+        assert [r["entry_price"] for r in result] == [0.50, 0.50, 0.60]
+
     def test_does_not_mutate_original(self):
         alerts = [{"side": "YES", "price": 0.70}]
         _enrich_alerts(alerts, "YES", [])
@@ -205,6 +233,11 @@ class TestTsOrd:
         val = _ts_ord("2026-01-15T12:00:00Z")
         assert val > 0
 
+    def test_iso_string_is_utc(self):
+        # 2026-01-15T12:00:00Z, independent of the local timezone.
+        assert _ts_ord("2026-01-15T12:00:00Z") == 1768478400.0
+        assert _ts_ord("2026-01-15T12:00:00.123+00:00") == 1768478400.0
+
     def test_unix_int(self):
         val = _ts_ord(1740000000)
         assert val == 1740000000.0
@@ -218,6 +251,25 @@ class TestTsOrd:
         assert val == 0.0
 
 
+# ------------------------------------------------------------------
+# Prompt headlines
+# ------------------------------------------------------------------
+
+class TestHeadlinesText:
+    def test_bulleted(self):
+        news = [{"headline": "First"}, {"headline": "Second"}]
+        assert _headlines_text(news) == "\n- First\n- Second"
+
+    def test_empty(self):
+        assert _headlines_text([]) == " (none)"
+
+    def test_capped_to_most_recent(self):
+        news = [{"headline": f"h{i}"} for i in range(30)]
+        text = _headlines_text(news)
+        assert text.count("\n- ") == 20
+        assert text.startswith("\n- h10") and text.endswith("h29")
+
+
 # ------------------------------------------------------------------
 # Resolution conversion
 # ------------------------------------------------------------------
@@ -232,3 +284,88 @@ class TestResolutionToInt:
     def test_case_insensitive(self):
         assert _resolution_to_int("yes") == 1
         assert _resolution_to_int("No") == 0
+
+
+# ------------------------------------------------------------------
+# wwatcher join
+# ------------------------------------------------------------------
+
+def test_normalise_title():
+    assert _normalise_title("  Will BTC hit $100k?! ") == "will btc hit  100k"
+    assert _normalise_title("Fed: rate-cut in 2026") == "fed  rate cut in 2026"
+    assert _normalise_title("Élection présidentielle 2027") == "élection présidentielle 2027"
+    assert _normalise_title("美国大选 Trump 胜出") == "美国大选 trump 胜出"
+
+
+@pytest.mark.asyncio
+async def test_load_wwatcher_alerts(db, cfg):
+    conn = sqlite3.connect(cfg.export.wwatcher_db_path)
+    conn.execute(
+        "CREATE TABLE alerts (id INTEGER PRIMARY KEY, market_id TEXT, "
+        "market_title TEXT, outcome TEXT, created_at INTEGER)"
+    )
+    conn.executemany(
+        "INSERT INTO alerts (market_id, market_title, outcome, created_at) VALUES (?, ?, ?, ?)",
+        [
+            ("m1", "", "YES", 1740000000),
+            ("other", "", "NO", 1740000000),
+            (None, "Will BTC hit 100k?", "NO", 1740000000),
+        ],
+    )
+    conn.commit()
+    conn.close()
+
+    markets = [
+        {"market_id": "m1", "title": "Rain in NYC"},
+        {"market_id": "m2", "title": "Will BTC hit 100k?"},
+    ]
+    result = await _load_wwatcher_alerts(db, cfg.export.wwatcher_db_path, markets)
+    assert [a["side"] for a in result["m1"]] == ["YES"]
+    assert [a["side"] for a in result["m2"]] == ["NO"]  # fuzzy title match
+    assert "other" not in result
+    # The wwatcher DB is detached again afterwards.
+    rows = await db.execute_fetchall("PRAGMA database_list")
+    assert [r[1] for r in rows] == ["main"]
+
+
+# ------------------------------------------------------------------
+# Exporters
+# ------------------------------------------------------------------
+
+@pytest.mark.asyncio
+async def test_export_all(db, cfg):
+    await upsert_market(db, platform="kalshi", market_id="T-1", title="Some market")
+    await mark_resolved(db, "kalshi", "T-1", "YES")
+    await insert_snapshot(
+        db, market_id="T-1", platform="kalshi", yes_price=0.8, snapshot_at="2020-01-01T00:00:00Z",
+    )
+    await db.commit()
+
+    paths = await export_all(db, cfg)
+    assert set(paths) == {"parquet", "grpo", "sft"}
+    assert pq.read_table(paths["parquet"]).column("market_id").to_pylist() == ["T-1"]
+    for fmt in ("grpo", "sft"):
+        with open(paths[fmt]) as fh:
+            assert len(fh.readlines()) == 1
+
+
+@pytest.mark.asyncio
+async def test_export_parquet_process_pool(db, cfg, monkeypatch):
+    # Force the worker-pool path even for a tiny export.
+    monkeypatch.setattr("collector.export._PARALLEL_MIN_MARKETS", 1)
+    for i in range(3):
+        mid = f"T-{i}"
+        await upsert_market(db, platform="kalshi", market_id=mid, title=f"Market {i}")
+        await mark_resolved(db, "kalshi", mid, "YES")
+        for j, price in enumerate((0.2, 0.4)):
+            await insert_snapshot(
+                db, market_id=mid, platform="kalshi", yes_price=price + i / 10,
+                snapshot_at=f"2020-01-0{j + 1}T00:00:00Z",
+            )
+    await db.commit()
+
+    table = pq.read_table(await export_parquet(db, cfg))
+    assert table.num_rows == 3
+    rows = sorted(table.to_pylist(), key=lambda r: r["market_id"])
+    assert [r["snapshot_count"] for r in rows] == [2, 2, 2]
+    assert [r["price_mean"] for r in rows] == pytest.approx([0.3, 0.4, 0.5])
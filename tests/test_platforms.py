@@ -2,27 +2,44 @@
 
 from __future__ import annotations
 
+import asyncio
 import json
 
 import httpx
 import pytest
+import pytest_asyncio
 import respx
 
 from collector.platforms.polymarket import PolymarketClient
-from collector.platforms.kalshi import KalshiClient
+from collector.platforms.kalshi import KalshiClient, _price_columns
+from collector.platforms.ratelimit import RateLimiter
 
 GAMMA_URL = "https://gamma-api.polymarket.com"
 CLOB_URL = "https://clob.polymarket.com"
 KALSHI_URL = "https://api.elections.kalshi.com/trade-api/v2"
 
 
+@pytest_asyncio.fixture
+async def poly_client():
+    client = PolymarketClient(GAMMA_URL, CLOB_URL)
+    yield client
+    await client.close()
+
+
+@pytest_asyncio.fixture
+async def kalshi_client():
+    client = KalshiClient(KALSHI_URL)
+    yield client
+    await client.close()
+
+
 # ------------------------------------------------------------------
 # Polymarket tests
 # ------------------------------------------------------------------
 
 @pytest.mark.asyncio
 @respx.mock
-async def test_polymarket_discover():
+async def test_polymarket_discover(poly_client):
     respx.get(f"{GAMMA_URL}/markets").mock(
         return_value=httpx.Response(
             200,
@@ -45,11 +62,10 @@ async def test_polymarket_discover():
         )
     )
 
-    client = PolymarketClient(GAMMA_URL, CLOB_URL)
-    markets = await client.discover_markets()
-    await client.close()
+    markets, snapshots = await poly_client.discover_markets()
 
     assert len(markets) == 1
+    assert snapshots[0]["yes_price"] == pytest.approx(0.65)
     m = markets[0]
     assert m["platform"] == "polymarket"
     assert m["market_id"] == "0xabc"
@@ -59,7 +75,7 @@ async def test_polymarket_discover():
 
 @pytest.mark.asyncio
 @respx.mock
-async def test_polymarket_check_resolution_yes():
+async def test_polymarket_check_resolution_yes(poly_client):
     respx.get(f"{GAMMA_URL}/markets/0xabc").mock(
         return_value=httpx.Response(
             200,
@@ -71,16 +87,14 @@ async def test_polymarket_check_resolution_yes():
         )
     )
 
-    client = PolymarketClient(GAMMA_URL, CLOB_URL)
-    result = await client.check_resolution("0xabc")
-    await client.close()
+    result = await poly_client.check_resolution("0xabc")
 
     assert result == "YES"
 
 
 @pytest.mark.asyncio
 @respx.mock
-async def test_polymarket_check_resolution_no():
+async def test_polymarket_check_resolution_no(poly_client):
     respx.get(f"{GAMMA_URL}/markets/0xdef").mock(
         return_value=httpx.Response(
             200,
@@ -92,16 +106,14 @@ async def test_polymarket_check_resolution_no():
         )
     )
 
-    client = PolymarketClient(GAMMA_URL, CLOB_URL)
-    result = await client.check_resolution("0xdef")
-    await client.close()
+    result = await poly_client.check_resolution("0xdef")
 
     assert result == "NO"
 
 
 @pytest.mark.asyncio
 @respx.mock
-async def test_polymarket_check_resolution_not_resolved():
+async def test_polymarket_check_resolution_not_resolved(poly_client):
     respx.get(f"{GAMMA_URL}/markets/0xpending").mock(
         return_value=httpx.Response(
             200,
@@ -112,43 +124,58 @@ async def test_polymarket_check_resolution_not_resolved():
         )
     )
 
-    client = PolymarketClient(GAMMA_URL, CLOB_URL)
-    result = await client.check_resolution("0xpending")
-    await client.close()
+    result = await poly_client.check_resolution("0xpending")
 
     assert result is None
 
 
 @pytest.mark.asyncio
 @respx.mock
-async def test_polymarket_fetch_prices():
-    respx.get(f"{GAMMA_URL}/markets/0xabc").mock(
+async def test_polymarket_fetch_prices(poly_client):
+    respx.get(f"{GAMMA_URL}/markets", params={"condition_ids": "0xabc"}).mock(
         return_value=httpx.Response(
             200,
-            json={
+            json=[{
+                "conditionId": "0xabc",
                 "outcomePrices": '["0.72", "0.28"]',
                 "volume": 5000,
                 "liquidity": 2000,
-            },
+            }],
         )
     )
 
-    client = PolymarketClient(GAMMA_URL, CLOB_URL)
-    snaps = await client.fetch_prices([{"market_id": "0xabc"}])
-    await client.close()
+    snaps = await poly_client.fetch_prices([{"market_id": "0xabc", "slug": "btc-100k"}])
 
     assert len(snaps) == 1
     assert snaps[0]["yes_price"] == pytest.approx(0.72)
     assert snaps[0]["no_price"] == pytest.approx(0.28)
 
 
+@pytest.mark.asyncio
+@respx.mock
+async def test_polymarket_fetch_prices_batches_condition_ids(poly_client):
+    def _respond(request):
+        ids = request.url.params.get_list("condition_ids")
+        return httpx.Response(
+            200, json=[{"conditionId": cid, "outcomePrices": '["0.5", "0.5"]'} for cid in ids],
+        )
+
+    route = respx.get(f"{GAMMA_URL}/markets").mock(side_effect=_respond)
+
+    markets = [{"market_id": f"0x{i:03x}", "slug": f"m{i}"} for i in range(120)]
+    snaps = await poly_client.fetch_prices(markets)
+
+    assert route.call_count == 3  # 50 + 50 + 20
+    assert {s["market_id"] for s in snaps} == {m["market_id"] for m in markets}
+
+
 # ------------------------------------------------------------------
 # Kalshi tests
 # ------------------------------------------------------------------
 
 @pytest.mark.asyncio
 @respx.mock
-async def test_kalshi_discover():
+async def test_kalshi_discover(kalshi_client):
     respx.get(f"{KALSHI_URL}/markets").mock(
         return_value=httpx.Response(
             200,
@@ -176,11 +203,10 @@ async def test_kalshi_discover():
         )
     )
 
-    client = KalshiClient(KALSHI_URL)
-    markets = await client.discover_markets()
-    await client.close()
+    markets, snapshots = await kalshi_client.discover_markets()
 
     assert len(markets) == 1
+    assert len(snapshots) == 1
     m = markets[0]
     assert m["platform"] == "kalshi"
     assert m["market_id"] == "FED-25MAR-T4.50"
@@ -189,7 +215,7 @@ async def test_kalshi_discover():
 
 @pytest.mark.asyncio
 @respx.mock
-async def test_kalshi_check_resolution_yes():
+async def test_kalshi_check_resolution_yes(kalshi_client):
     respx.get(f"{KALSHI_URL}/markets/FED-25MAR-T4.50").mock(
         return_value=httpx.Response(
             200,
@@ -203,16 +229,14 @@ async def test_kalshi_check_resolution_yes():
         )
     )
 
-    client = KalshiClient(KALSHI_URL)
-    result = await client.check_resolution("FED-25MAR-T4.50")
-    await client.close()
+    result = await kalshi_client.check_resolution("FED-25MAR-T4.50")
 
     assert result == "YES"
 
 
 @pytest.mark.asyncio
 @respx.mock
-async def test_kalshi_check_resolution_no():
+async def test_kalshi_check_resolution_no(kalshi_client):
     respx.get(f"{KALSHI_URL}/markets/FED-25MAR-T4.50").mock(
         return_value=httpx.Response(
             200,
@@ -226,16 +250,14 @@ async def test_kalshi_check_resolution_no():
         )
     )
 
-    client = KalshiClient(KALSHI_URL)
-    result = await client.check_resolution("FED-25MAR-T4.50")
-    await client.close()
+    result = await kalshi_client.check_resolution("FED-25MAR-T4.50")
 
     assert result == "NO"
 
 
 @pytest.mark.asyncio
 @respx.mock
-async def test_kalshi_check_resolution_not_settled():
+async def test_kalshi_check_resolution_not_settled(kalshi_client):
     respx.get(f"{KALSHI_URL}/markets/FED-25MAR-T4.50").mock(
         return_value=httpx.Response(
             200,
@@ -249,16 +271,14 @@ async def test_kalshi_check_resolution_not_settled():
         )
     )
 
-    client = KalshiClient(KALSHI_URL)
-    result = await client.check_resolution("FED-25MAR-T4.50")
-    await client.close()
+    result = await kalshi_client.check_resolution("FED-25MAR-T4.50")
 
     assert result is None
 
 
 @pytest.mark.asyncio
 @respx.mock
-async def test_kalshi_fetch_prices():
+async def test_kalshi_fetch_prices(kalshi_client):
     respx.get(f"{KALSHI_URL}/markets").mock(
         return_value=httpx.Response(
             200,
@@ -280,10 +300,166 @@ async def test_kalshi_fetch_prices():
         )
     )
 
-    client = KalshiClient(KALSHI_URL)
-    snaps = await client.fetch_prices([{"market_id": "FED-25MAR-T4.50"}])
-    await client.close()
+    snaps = await kalshi_client.fetch_prices([{"market_id": "FED-25MAR-T4.50"}])
 
     assert len(snaps) == 1
     assert snaps[0]["yes_price"] == pytest.approx(0.66)  # midpoint of 0.65 and 0.67
     assert snaps[0]["platform"] == "kalshi"
+
+
+@pytest.mark.asyncio
+@respx.mock
+async def test_kalshi_fetch_prices_reuses_discover_listing(kalshi_client):
+    route = respx.get(f"{KALSHI_URL}/markets").mock(
+        return_value=httpx.Response(
+            200,
+            json={
+                "markets": [
+                    {"ticker": "FED-25MAR-T4.50", "status": "open", "yes_bid": 65, "yes_ask": 67},
+                ],
+                "cursor": "",
+            },
+        )
+    )
+
+    _, discover_snaps = await kalshi_client.discover_markets()
+    # Same listing as discover: its prices are already captured.
+    assert await kalshi_client.fetch_prices([{"market_id": "FED-25MAR-T4.50"}]) == []
+    assert route.call_count == 1
+
+    kalshi_client._cache.clear()  # listing expired
+    snaps = await kalshi_client.fetch_prices([{"market_id": "FED-25MAR-T4.50"}])
+    kalshi_client._cache.clear()
+    tracked_snaps = await kalshi_client.fetch_prices()  # tickers from the last discover
+
+    assert route.call_count == 3
+    assert snaps == discover_snaps
+    assert tracked_snaps == snaps
+
+
+@pytest.mark.asyncio
+@respx.mock
+async def test_kalshi_discover_reuses_snapshot_listing(kalshi_client):
+    route = respx.get(f"{KALSHI_URL}/markets").mock(
+        return_value=httpx.Response(
+            200,
+            json={
+                "markets": [
+                    {"ticker": "FED-25MAR-T4.50", "status": "open", "yes_bid": 65, "yes_ask": 67},
+                ],
+                "cursor": "",
+            },
+        )
+    )
+
+    assert kalshi_client.needs_active_markets
+    snaps = await kalshi_client.fetch_prices([{"market_id": "FED-25MAR-T4.50"}])
+    # Same listing as the snapshot run: markets come back, prices don't.
+    markets, discover_snaps = await kalshi_client.discover_markets()
+    assert not kalshi_client.needs_active_markets
+
+    assert route.call_count == 1
+    assert len(snaps) == 1
+    assert [m["market_id"] for m in markets] == ["FED-25MAR-T4.50"]
+    assert discover_snaps == []
+
+
+def test_kalshi_price_columns_one_sided_and_missing_quotes():
+    rows = _price_columns([
+        {"yes_bid": 40, "yes_ask": 44},
+        {"yes_bid": None, "yes_ask": 30},
+        {"yes_bid": 0.2},
+        {},
+    ])
+    assert rows[0] == pytest.approx((0.42, 0.58, 0.16))
+    assert rows[1] == pytest.approx((0.30, 0.70, 0.40))
+    assert rows[2] == pytest.approx((0.20, 0.80, 0.60))
+    assert rows[3] == (None, None, None)
+
+
+# ------------------------------------------------------------------
+# Pagination / rate limiting
+# ------------------------------------------------------------------
+
+@pytest.mark.asyncio
+@respx.mock
+async def test_polymarket_backfill_keyset_pagination(poly_client):
+    def page(request):
+        after = int(request.url.params.get("id_gt", 0))
+        ids = range(after + 1, min(after + 100, 130) + 1)
+        return httpx.Response(200, json=[
+            {"id": str(i), "conditionId": f"0x{i}", "question": "Q", "resolved": True,
+             "outcomePrices": '["1", "0"]'}
+            for i in ids
+        ])
+
+    route = respx.get(f"{GAMMA_URL}/markets").mock(side_effect=page)
+
+    markets = await poly_client.fetch_resolved_markets()
+
+    assert len(markets) == 130
+    assert all(m["resolution"] == "YES" for m in markets)
+    assert route.call_count == 2
+    assert route.calls[1].request.url.params["id_gt"] == "100"
+
+
+@pytest.mark.asyncio
+@respx.mock
+async def test_polymarket_pagination_honours_total_count(poly_client):
+    route = respx.get(f"{GAMMA_URL}/markets").mock(
+        return_value=httpx.Response(
+            200,
+            headers={"X-Total-Count": "100"},
+            json=[{"id": str(i), "conditionId": f"0x{i}"} for i in range(1, 101)],
+        )
+    )
+
+    markets = await poly_client.fetch_resolved_markets()
+
+    assert len(markets) == 100
+    assert route.call_count == 1  # no probe for an empty trailing page
+
+
+@pytest.mark.asyncio
+@respx.mock
+async def test_polymarket_pagination_falls_back_to_offset(poly_client, caplog):
+    # A server that ignores id_gt but honours offset.
+    def _respond(request):
+        offset = int(request.url.params.get("offset", 0))
+        ids = range(offset + 1, min(offset + 100, 250) + 1)
+        return httpx.Response(200, json=[{"id": str(i), "conditionId": f"0x{i}"} for i in ids])
+
+    route = respx.get(f"{GAMMA_URL}/markets").mock(side_effect=_respond)
+
+    markets = await poly_client.fetch_resolved_markets()
+
+    assert [m["market_id"] for m in markets] == [f"0x{i}" for i in range(1, 251)]
+    assert route.call_count == 4  # first page, ignored cursor, offset 100, offset 200
+    assert "falling back to offset paging" in caplog.text
+
+
+@pytest.mark.asyncio
+@respx.mock
+async def test_kalshi_retries_transient_errors(kalshi_client):
+    route = respx.get(f"{KALSHI_URL}/markets/FED-25MAR-T4.50").mock(side_effect=[
+        httpx.Response(503, headers={"Retry-After": "0"}),
+        httpx.Response(429, headers={"Retry-After": "0"}),
+        httpx.Response(200, json={"market": {"status": "settled", "result": "yes"}}),
+    ])
+
+    result = await kalshi_client.check_resolution("FED-25MAR-T4.50")
+
+    assert result == "YES"
+    assert route.call_count == 3
+
+
+@pytest.mark.asyncio
+async def test_rate_limiter_spaces_requests():
+    limiter = RateLimiter(20)  # 20/s → 50ms per token after the initial burst
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    for _ in range(25):
+        async with limiter:
+            pass
+    # 20 burst tokens, then 5 more at 50ms each.
+    assert loop.time() - start >= 0.2